@@ -1,4 +1,26 @@
-from .cli import main
-from . import parser
-from . import renderer
-from . import construct
\ No newline at end of file
+"""
+Ark.
+
+Submodules are imported on first access (e.g. `ark.renderer`), so that
+running the `ark` and `arkp` entry points only loads what they use.
+"""
+
+import importlib
+
+
+_SUBMODULES = {
+    'main': '.cli.main',
+    'cli': '.cli',
+    'parser': '.parser',
+    'renderer': '.renderer',
+    'construct': '.construct',
+}
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        module = importlib.import_module(_SUBMODULES[name], __name__)
+        globals()[name] = module
+        return module
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
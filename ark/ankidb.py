@@ -5,7 +5,14 @@ Interface to the Anki data store.
 import os
 import sys
 import time
-from typing import List, Tuple, Any
+import hashlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple, Any
+
+from .stats import STATS
+
+
+IDENTITY_PREFIX = 'ark:' # GUIDs of notes inserted by `sync_cards`
 
 
 class AnkiDB:
@@ -20,11 +27,16 @@ class AnkiDB:
         self.db_location: str = db_location
         self.collection: Any = self._get_collection()
         self.DEFAULT_MODEL: str = 'Cloze'
+        self._field_index: Optional[Counter] = None
+        # Notes of the model not inserted by `sync_cards`, by hash; adoptable
+        self._legacy_notes: Dict[bytes, List[int]] = {}
+        # Identities skipped by `sync_cards` as duplicates, by hash
+        self._skipped: Dict[bytes, Tuple[str, str]] = {}
 
-    def insert_cards(self, cards: List[str], deck: str) -> None:
+    def insert_cards(self, cards: Iterable[str], deck: str) -> None:
         """Insert cards of a specific model into a particular deck.
 
-        :param cards: List of cards (HTML interspersed with e.g. cloze tags)
+        :param cards: Cards (HTML interspersed with e.g. cloze tags)
         :param deck:  Deck
         :param model: Model (basic, cloze, etc.)
         :raises ValueError: [...]
@@ -37,13 +49,185 @@ class AnkiDB:
             note = self._create_card(self.DEFAULT_MODEL)
             note.model()['did'] = deck['id'] # Make card's deck be `deck`
             note.fields[0] = card            # fields=[content, tags]
-            self.collection.addNote(note)
+            with STATS.timer('anki.addNote', items=1):
+                self.collection.addNote(note)
             # Card IDs are timestamps (integer milliseconds). Avoid collisions
             # by staggering insertion time
             time.sleep(0.002)
         
         self._remove_duplicates()
-        self.collection.save() # Commit to database
+        with STATS.timer('anki.save'):
+            self.collection.save() # Commit to database
+
+    def insert_cards_bulk(self, cards: Iterable[str], deck: str, commit: bool = True) -> int:
+        """Insert a batch of cards into a particular deck, in one transaction.
+
+        Note IDs are allocated up front: consecutive integers following both
+        the current time (in milliseconds) and the largest existing ID. This
+        keeps them unique and ordered without staggering insertion time.
+
+        Cards whose text duplicates an existing note of the model (or an
+        earlier card of the batch) are skipped before insertion.
+
+        :param cards: Cards (HTML interspersed with e.g. cloze tags)
+        :param deck:  Deck
+        :param commit: Whether to commit; otherwise see `commit`
+        :returns: Number of notes inserted
+        :raises ValueError: When the deck doesn't exist
+        """
+        deck = self.collection.decks.byName(deck)
+        if deck is None:
+            raise ValueError("Deck doesn't exist")
+
+        model = self._get_card_model(self.DEFAULT_MODEL)
+        model['did'] = deck['id'] # Make cards' deck be `deck`
+        index = self._duplicate_index(model)
+        note_id = self._next_id('notes')
+        inserted = 0
+
+        for card in cards:
+            digest = self._field_hash(card)
+            if digest is not None:
+                if index[digest]:
+                    continue
+                index[digest] += 1
+                self._legacy_notes.setdefault(digest, []).append(note_id)
+
+            note = self.anki.notes.Note(self.collection, model)
+            note.id = note_id
+            note.fields[0] = card # fields=[content, tags]
+            # Card IDs are probed against the table by Anki, so stay unique
+            with STATS.timer('anki.addNote', items=1):
+                self.collection.addNote(note)
+            note_id += 1
+            inserted += 1
+
+        if commit:
+            self.commit()
+        return inserted
+
+    def sync_cards(
+        self, cards: Dict[str, str], deck: str, scope: str, commit: bool = True
+    ) -> Tuple[int, int, int]:
+        """Make the notes within `scope` match `cards`.
+
+        Each card's identity is stored as its note's GUID. Notes whose
+        identity is unchanged keep their review history: their text is
+        updated in place when it differs. Notes of the scope which no longer
+        have a card are deleted, before new identities are inserted.
+
+        A new identity whose text duplicates an existing note isn't inserted.
+        If that note predates syncing (its GUID lacks `IDENTITY_PREFIX`, e.g.
+        inserted by `insert_cards_bulk`), the identity adopts it, keeping its
+        history. If it belongs to another identity, and is deleted later in
+        the session (its card having moved here from a file synced later),
+        it is given to this identity rather than deleted.
+
+        :param cards: Cards (HTML interspersed with e.g. cloze tags), keyed by
+            identity; every identity begins with `scope`
+        :param deck:  Deck for inserted notes
+        :param scope: Identity prefix owned by this batch, e.g. an Org file's
+        :param commit: Whether to commit; otherwise see `commit`
+        :returns: Number of notes inserted, updated and deleted
+        :raises ValueError: When the deck doesn't exist
+        """
+        deck = self.collection.decks.byName(deck)
+        if deck is None:
+            raise ValueError("Deck doesn't exist")
+
+        model = self._get_card_model(self.DEFAULT_MODEL)
+        model['did'] = deck['id'] # Make cards' deck be `deck`
+        index = self._duplicate_index(model)
+        note_id = self._next_id('notes')
+
+        # Identities of the scope skipped earlier are reconsidered below
+        self._skipped = {
+            digest: skipped for digest, skipped in self._skipped.items()
+            if not skipped[0].startswith(scope)
+        }
+
+        existing: Dict[str, Tuple[int, str]] = {}
+        rows = self.collection.db.all(
+            "select id, guid, flds from notes where substr(guid, 1, ?) = ?",
+            len(scope), scope,
+        )
+        for nid, guid, fields in rows:
+            existing[guid] = (nid, self.anki.utils.splitFields(fields)[0])
+
+        inserted, updated = 0, 0
+
+        # Notes whose card has been removed, so their text may be inserted again
+        removed = []
+        for identity in [identity for identity in existing if identity not in cards]:
+            nid, text = existing.pop(identity)
+            digest = self._field_hash(text)
+            skipped = self._skipped.pop(digest, None) if digest is not None else None
+            if skipped is None:
+                removed.append(nid)
+                self._unindex(digest)
+            else:
+                # The card moved to an identity synced earlier
+                self._update_note(nid, *skipped)
+                updated += 1
+
+        if removed:
+            with STATS.timer('anki.remNotes', items=len(removed)):
+                self.collection.remNotes(removed)
+
+        for identity, (nid, text) in existing.items():
+            card = cards[identity]
+            if text == card:
+                continue
+
+            self._update_note(nid, identity, card)
+            self._unindex(self._field_hash(text))
+            digest = self._field_hash(card)
+            if digest is not None:
+                index[digest] += 1
+            updated += 1
+
+        for identity, card in cards.items():
+            if identity in existing:
+                continue
+
+            digest = self._field_hash(card)
+            if digest is not None and index[digest]:
+                legacy = self._legacy_notes.get(digest)
+                if legacy:
+                    self._update_note(legacy.pop(0), identity, card)
+                    updated += 1
+                else:
+                    self._skipped[digest] = (identity, card)
+                continue
+            if digest is not None:
+                index[digest] += 1
+
+            note = self.anki.notes.Note(self.collection, model)
+            note.id = note_id
+            note.guid = identity
+            note.fields[0] = card
+            with STATS.timer('anki.addNote', items=1):
+                self.collection.addNote(note)
+            note_id += 1
+            inserted += 1
+
+        if commit:
+            self.commit()
+        return inserted, updated, len(removed)
+
+    def commit(self) -> None:
+        """Commit the changes made so far, e.g. by several batches passed
+        `commit=False`, in one transaction."""
+        with STATS.timer('anki.save'):
+            self.collection.save()
+
+    def rollback(self) -> None:
+        """Discard the changes made since the last commit, and the session's
+        duplicate index, which may describe them."""
+        self.collection.rollback()
+        self._field_index = None
+        self._legacy_notes = {}
+        self._skipped = {}
 
     def insert_image(self, image_path: str) -> str:
         """Insert an image into the media database."""
@@ -58,7 +242,8 @@ class AnkiDB:
         field_name = "Text"
 
         # Tuple contains: (duplicate_text, List[card_ids])
-        duplicates: List[Tuple[str, List[int]]] = self.collection.findDupes(field_name)
+        with STATS.timer('anki.findDupes'):
+            duplicates: List[Tuple[str, List[int]]] = self.collection.findDupes(field_name)
         for dupe in duplicates:
             # Remove all but the least-recently inserted card. (Card IDs are 
             # monotonically increasing integers.)
@@ -66,6 +251,58 @@ class AnkiDB:
             card_ids.sort()
             self.collection.remNotes(card_ids[1:]) # Select all but the first
 
+    def _duplicate_index(self, model: Any) -> Counter:
+        """Return the number of notes of `model` with each hash of the first
+        field; and find the notes which predate syncing.
+
+        Built once per session, then kept up to date by `insert_cards_bulk`
+        and `sync_cards`.
+        """
+        if self._field_index is None:
+            with STATS.timer('anki.duplicate_index'):
+                self._field_index = Counter()
+                rows = self.collection.db.all(
+                    "select id, guid, flds from notes where mid = ? order by id", model['id']
+                )
+                for nid, guid, fields in rows:
+                    digest = self._field_hash(self.anki.utils.splitFields(fields)[0])
+                    if digest is None:
+                        continue
+                    self._field_index[digest] += 1
+                    if not guid.startswith(IDENTITY_PREFIX):
+                        self._legacy_notes.setdefault(digest, []).append(nid)
+
+        return self._field_index
+
+    def _unindex(self, digest: Optional[bytes]) -> None:
+        """Forget a note with the hash `digest`, once deleted or changed."""
+        if digest is None:
+            return
+        self._field_index[digest] -= 1
+        if self._field_index[digest] <= 0:
+            del self._field_index[digest]
+
+    def _update_note(self, nid: int, identity: str, card: str) -> None:
+        """Set a note's identity and text."""
+        with STATS.timer('anki.update', items=1):
+            note = self.collection.getNote(nid)
+            note.guid = identity
+            note.fields[0] = card
+            # Given `mod`, Anki writes the note even if only its GUID changed
+            note.flush(mod=int(time.time()))
+
+    def _field_hash(self, field: str) -> Optional[bytes]:
+        """Hash a field as normalised by `findDupes`; empty fields have none."""
+        value = self.anki.utils.stripHTMLMedia(field)
+        if not value:
+            return None
+        return hashlib.sha1(value.encode('utf-8')).digest()
+
+    def _next_id(self, table: str) -> int:
+        """Return an ID greater than any in `table`, and no older than now."""
+        largest = self.collection.db.scalar(f"select max(id) from {table}") or 0
+        return max(int(time.time() * 1000), largest + 1)
+
     def _create_card(self, model: str) -> Any:
         """Create an empty card of a particular card model."""
         return self.anki.notes.Note(self.collection, self._get_card_model(model))
@@ -76,4 +313,5 @@ class AnkiDB:
 
     def _get_collection(self) -> Any:
         """Return the Anki collection. The abstraction over the SQLite database."""
-        return self.anki.Collection(self.db_location, log=True)
+        with STATS.timer('anki.open'):
+            return self.anki.Collection(self.db_location, log=True)
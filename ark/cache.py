@@ -0,0 +1,71 @@
+"""
+Persistent cache of constructed cards, so unchanged Anki blocks are not
+re-rendered on every run.
+"""
+
+import os
+import json
+from typing import Dict, List
+
+from .config import DEFAULT_PROFILE
+
+
+CACHE_VERSION = 2
+
+
+class CardCache:
+    """
+    On-disk cache of each Org file's constructed cards.
+
+    Entries are grouped by (absolute) file path, then keyed by
+    `construct.block_key`: a hash of the Anki block and its heading context.
+
+    :param path: Location of the JSON cache file
+    :param profile: Grammar the cards are rendered with (see `Render`)
+    """
+    def __init__(self, path: str, profile: str = DEFAULT_PROFILE):
+        self.path: str = path
+        self.profile: str = profile
+        self.files: Dict[str, Dict[str, List[str]]] = self._load()
+
+    def entries(self, org_file: str) -> Dict[str, List[str]]:
+        """Return the cached blocks of an Org file."""
+        return self.files.get(os.path.abspath(org_file), {})
+
+    def update(self, org_file: str, entries: Dict[str, List[str]]) -> None:
+        """Replace the cached blocks of an Org file; stale blocks are dropped."""
+        self.files[os.path.abspath(org_file)] = entries
+
+    def evict(self, org_file: str) -> None:
+        """Forget an Org file, e.g. once deleted."""
+        self.files.pop(os.path.abspath(org_file), None)
+
+    def save(self) -> None:
+        """Write the cache to disk, atomically replacing the previous one.
+        Files which no longer exist (deleted or renamed) are dropped."""
+        self.files = {
+            org_file: entries for org_file, entries in self.files.items()
+            if os.path.exists(org_file)
+        }
+
+        interim_path = f'{self.path}.tmp'
+        with open(interim_path, 'w') as fd:
+            json.dump({'version': CACHE_VERSION, 'profile': self.profile, 'files': self.files}, fd)
+
+        os.replace(interim_path, self.path)
+
+    def _load(self) -> Dict[str, Dict[str, List[str]]]:
+        """Read the cache; a missing, corrupt or outdated cache, or one
+        rendered with another profile, is discarded."""
+        try:
+            with open(self.path) as fd:
+                cache = json.load(fd)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+        if not isinstance(cache, dict) or cache.get('version') != CACHE_VERSION:
+            return {}
+        if cache.get('profile', DEFAULT_PROFILE) != self.profile:
+            return {}
+
+        return cache['files']
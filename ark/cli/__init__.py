@@ -1,2 +1,8 @@
-from . import main
-from . import pic
+import importlib
+
+
+def __getattr__(name):
+    if name in ('main', 'pic'):
+        return importlib.import_module(f'.{name}', __name__)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
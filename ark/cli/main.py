@@ -2,61 +2,76 @@
 Ark.
 """
 
+import os
 import sys
+import json
 import argparse
-import sqlite3
-from typing import List
+from itertools import repeat
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple, Union
 
-from ..parser import CardLexer
-from ..construct import construct_cards
-from ..ankidb import AnkiDB
-from ..utils import add_anki_searchpath
-from ..config import get_config, CONFIG_FILE, CONFIG_DIR
+from ..stats import STATS
+from ..config import (
+    get_config, get_cache_path, get_socket_path,
+    CONFIG_FILE, CONFIG_DIR, RENDER_CACHE_FILE, DEFAULT_PROFILE
+)
+
+# The pipeline (mistune, Pygments, multiprocessing) is imported on first use,
+# to keep `ark --help` and editor save hooks fast; see `bench/startup.py`
+if TYPE_CHECKING:
+    from ..ankidb import AnkiDB
+    from ..cache import CardCache
+    from ..renderer import Render
 
 
 EXIT_SUCCESS = 0
 EXIT_FAILURE = 1
 
+Cards = Union[List[str], Dict[str, str]]
+
 
 def run(args) -> int:
     """Run the application.
     
-    :param args: { deck: str, file: List[str], dry: boolean }
+    :param args: { deck: str, file: List[str], dry: boolean, mmap: boolean,
+                   no_cache: boolean, jobs: int, sync: boolean }
     :returns: Process exit code
     """
+    import sqlite3
+    from ..construct import file_scope
 
-    try:
-        config = get_config()
-    except FileNotFoundError as e:
-        print("Error: Configuration file not found.")
-        print(f"Initialise configuration file '{CONFIG_FILE}' at '{CONFIG_DIR}'.")
-        print("See [documentation].")
-        return EXIT_FAILURE
-    except json.JSONDecodeError as e:
-        print(f"Error: Configuration file not formatted correctly: {e}.")
-        print("See [documentation].")
-        return EXIT_FAILURE
-    except KeyError as e:
-        print("Error: Configuration file missing field 'anki_db'")
-        print("See [documentation].")
+    config = load_config()
+    if config is None:
         return EXIT_FAILURE
 
     try:
-        for org_file in args.file:
-            with open(org_file) as fd:
-                contents: str = fd.read()
-
-            tokens = CardLexer(contents).lex()
-            cards = construct_cards(tokens)
-
-            if args.dry:
-                for card in cards:
-                    print(card)
-            else:
-                add_anki_searchpath()
-                import anki
-                anki = AnkiDB(anki, config['anki_db'])
-                anki.insert_cards(cards, args.deck)
+        profile = config.get('profile', DEFAULT_PROFILE)
+        cache, md = open_caches(args.no_cache, profile)
+
+        if args.jobs > 1:
+            batches = parallel_cards(args.file, args.jobs, args.mmap, cache, profile, args.sync)
+        elif args.sync:
+            batches = (read_keyed_cards(org_file, cache, md) for org_file in args.file)
+        else:
+            batches = (read_cards(org_file, args.mmap, cache, md) for org_file in args.file)
+
+        if not args.dry:
+            ankidb = open_collection(config)
+
+        # Files are constructed in order; the database is the single writer
+        for org_file, cards in zip(args.file, batches):
+            with STATS.timer('file', items=1):
+                if args.dry:
+                    for card in (cards.values() if args.sync else cards):
+                        print(card)
+                elif args.sync:
+                    ankidb.sync_cards(cards, args.deck, file_scope(org_file))
+                else:
+                    ankidb.insert_cards_bulk(cards, args.deck)
+
+        if cache is not None:
+            with STATS.timer('cache.save'):
+                cache.save()
+                md.save()
 
         return EXIT_SUCCESS
     except FileNotFoundError as file_error:
@@ -84,6 +99,417 @@ def run(args) -> int:
         return EXIT_FAILURE
 
 
+def serve(args) -> int:
+    """Run the `ark-serve` daemon, until it is stopped.
+
+    :param args: { socket: str, dry: boolean, no_cache: boolean, stop: boolean }
+    :returns: Process exit code
+    """
+    import signal
+    import sqlite3
+    from ..daemon import Daemon, serve as serve_socket, request
+
+    socket_path = args.socket or get_socket_path()
+    if args.stop:
+        try:
+            request(socket_path, {'command': 'shutdown'})
+        except ConnectionError:
+            print(f"Error: No ark daemon listening on '{socket_path}'.")
+            return EXIT_FAILURE
+        return EXIT_SUCCESS
+
+    config = load_config()
+    if config is None:
+        return EXIT_FAILURE
+
+    def terminate(signum: int, frame: Any) -> None:
+        raise SystemExit(EXIT_SUCCESS)
+
+    # Exit through `serve_socket`, so the caches are saved
+    signal.signal(signal.SIGTERM, terminate)
+
+    try:
+        cache, md = open_caches(args.no_cache, config.get('profile', DEFAULT_PROFILE))
+        ankidb = None if args.dry else open_collection(config)
+        serve_socket(Daemon(ankidb, cache, md), socket_path)
+        return EXIT_SUCCESS
+    except KeyboardInterrupt:
+        return EXIT_SUCCESS
+    except AssertionError:
+        print("Error: Path to Anki database must end in 'anki2'.")
+        return EXIT_FAILURE
+    except sqlite3.OperationalError as sql_error:
+        print(f"Error: Cannot access Anki database: {sql_error}.")
+        return EXIT_FAILURE
+    except ModuleNotFoundError as module_error:
+        print(f"Error: {module_error.msg}.")
+        print("Ensure that 'anki' submodule has been cloned.")
+        return EXIT_FAILURE
+    except ValueError as val_error:
+        print(f"Error: {val_error}.")
+        return EXIT_FAILURE
+
+
+def watch(args) -> int:
+    """Run `ark-watch`, re-syncing Org files as they change, until interrupted.
+
+    :param args: { deck: str, directory: str, dry: boolean, no_cache: boolean,
+                   sync: boolean, poll: boolean, interval: float, debounce: float }
+    :returns: Process exit code
+    """
+    import sqlite3
+    from ..watch import open_watcher, batches, sync_files
+
+    config = load_config()
+    if config is None:
+        return EXIT_FAILURE
+
+    try:
+        cache, md = open_caches(args.no_cache, config.get('profile', DEFAULT_PROFILE))
+        ankidb = None if args.dry else open_collection(config)
+        watcher = open_watcher(args.directory, args.poll, args.interval)
+
+        try:
+            for paths in batches(watcher, args.debounce):
+                counts, inserted, updated, deleted = sync_files(
+                    paths, args.deck, ankidb, cache, md, args.sync
+                )
+                for path, count in counts.items():
+                    print(f"{os.path.relpath(path, args.directory)}: {count} cards")
+                if ankidb is not None:
+                    print(f"{inserted} inserted, {updated} updated, {deleted} deleted")
+                sys.stdout.flush()
+        finally:
+            watcher.close()
+    except KeyboardInterrupt:
+        return EXIT_SUCCESS
+    except AssertionError:
+        print("Error: Path to Anki database must end in 'anki2'.")
+        return EXIT_FAILURE
+    except sqlite3.OperationalError as sql_error:
+        print(f"Error: Cannot access Anki database: {sql_error}.")
+        return EXIT_FAILURE
+    except ModuleNotFoundError as module_error:
+        print(f"Error: {module_error.msg}.")
+        print("Ensure that 'anki' submodule has been cloned.")
+        return EXIT_FAILURE
+    except ValueError as val_error:
+        print(f"Error: {val_error}.")
+        return EXIT_FAILURE
+
+
+def push(args) -> int:
+    """Send files (or Org text, from stdin with `-`) to the `ark-serve`
+    daemon, rather than opening the collection.
+
+    :param args: As for `run`, with { socket: str }
+    :returns: Process exit code
+    """
+    from ..daemon import request
+
+    if args.file == ['-']:
+        payload = {
+            'deck': args.deck, 'org': sys.stdin.read(), 'sync': args.sync, 'dry': args.dry
+        }
+    else:
+        payload = {
+            'deck': args.deck,
+            'files': [os.path.abspath(org_file) for org_file in args.file],
+            'sync': args.sync,
+            'dry': args.dry,
+        }
+
+    socket_path = args.socket or get_socket_path()
+    try:
+        response = request(socket_path, payload)
+    except ConnectionError:
+        print(f"Error: No ark daemon listening on '{socket_path}'.")
+        print("Start one with 'ark-serve'.")
+        return EXIT_FAILURE
+
+    if not response['ok']:
+        print(f"Error: {response['error']}.")
+        return EXIT_FAILURE
+
+    for card in response.get('cards', []):
+        print(card)
+
+    return EXIT_SUCCESS
+
+
+def load_config() -> Optional[Dict[str, str]]:
+    """Read the configuration file, reporting any problem with it.
+
+    :returns: Configuration, or `None` if it can't be used
+    """
+    try:
+        return get_config()
+    except FileNotFoundError as e:
+        print("Error: Configuration file not found.")
+        print(f"Initialise configuration file '{CONFIG_FILE}' at '{CONFIG_DIR}'.")
+        print("See [documentation].")
+    except json.JSONDecodeError as e:
+        print(f"Error: Configuration file not formatted correctly: {e}.")
+        print("See [documentation].")
+    except KeyError as e:
+        print("Error: Configuration file missing field 'anki_db'")
+        print("See [documentation].")
+
+    return None
+
+
+def open_caches(
+    no_cache: bool, profile: str = DEFAULT_PROFILE
+) -> Tuple[Optional['CardCache'], 'Render']:
+    """Return the card cache (`None` if bypassed) and a renderer.
+
+    :param no_cache: Whether to bypass the caches
+    :param profile: Grammar to render with, see `renderer.PROFILES`
+    :raises ValueError: When the profile is unknown
+    """
+    from ..cache import CardCache
+    from ..renderer import Render
+
+    if no_cache:
+        return None, Render(profile=profile)
+
+    md = Render(cache_path=get_cache_path(RENDER_CACHE_FILE), profile=profile)
+    return CardCache(get_cache_path(), profile), md
+
+
+def open_collection(config: Dict[str, str]) -> 'AnkiDB':
+    """Open the configured Anki collection."""
+    from ..ankidb import AnkiDB
+    from ..utils import add_anki_searchpath
+
+    add_anki_searchpath()
+    import anki
+    return AnkiDB(anki, config['anki_db'])
+
+
+def read_cards(
+    org_file: str, mmap: bool, cache: Optional['CardCache'], md: Optional['Render'] = None
+) -> Iterator[str]:
+    """Lazily construct the cards of an Org file.
+
+    Cached blocks are keyed by their raw bytes, which only the memory-mapped
+    index keeps; so the file is read line by line only with no cache and no
+    `mmap`. Either way, cards are yielded as they are constructed.
+
+    :param org_file: Path to the Org file
+    :param mmap: Whether to memory-map the file, rather than stream its lines;
+        only consulted without a `cache`
+    :param cache: Card cache to consult and update; the file is then always
+        memory-mapped
+    :param md: Renderer to share between files
+    :returns: Iterator of HTML-formatted cards
+    """
+    from ..construct import iter_cards, construct_blocks
+    from ..index import OrgIndex
+    from ..parser import CardLexer, report_skipped
+
+    if cache is not None:
+        # Cards are yielded as their block is constructed; the cache is only
+        # updated once every block has been
+        entries: Dict[str, List[str]] = {}
+        with OrgIndex(org_file) as index:
+            yield from construct_blocks(index, cache.entries(org_file), entries, md)
+        report_skipped(org_file, index.lexer.skipped)
+        cache.update(org_file, entries)
+    elif mmap:
+        with OrgIndex(org_file) as index:
+            yield from iter_cards(STATS.iterate('lex', index.tokens()), md)
+        report_skipped(org_file, index.lexer.skipped)
+    else:
+        # Lines are lexed and cards rendered as the file is read
+        lexer = CardLexer()
+        with open(org_file) as fd:
+            yield from iter_cards(STATS.iterate('lex', lexer.stream(fd)), md)
+        report_skipped(org_file, lexer.skipped)
+
+
+def read_keyed_cards(
+    org_file: str, cache: Optional['CardCache'], md: Optional['Render'] = None
+) -> Dict[str, str]:
+    """Construct the cards of an Org file, keyed by their stable identity.
+
+    :param org_file: Path to the Org file
+    :param cache: Card cache to consult and update
+    :param md: Renderer to share between files
+    :returns: Cards keyed by identity, see `construct_keyed`
+    """
+    from ..construct import construct_keyed
+    from ..index import OrgIndex
+    from ..parser import report_skipped
+
+    with OrgIndex(org_file) as index:
+        entries = {} if cache is None else cache.entries(org_file)
+        cards, entries = construct_keyed(org_file, index, entries, md)
+    report_skipped(org_file, index.lexer.skipped)
+
+    if cache is not None:
+        cache.update(org_file, entries)
+
+    return cards
+
+
+def construct_file(
+    org_file: str,
+    mmap: bool,
+    entries: Optional[Dict[str, List[str]]],
+    profile: str = DEFAULT_PROFILE,
+    keyed: bool = False,
+) -> Tuple[Cards, Optional[Dict[str, List[str]]]]:
+    """Construct every card of an Org file. Run in the worker processes of
+    `--jobs`, so takes and returns the file's cache entries rather than the
+    cache itself.
+
+    :param org_file: Path to the Org file
+    :param mmap: Whether to memory-map the file, rather than stream its lines
+    :param entries: Cached blocks of the file, or `None` to bypass the cache
+    :param profile: Grammar to render with, see `renderer.PROFILES`
+    :param keyed: Whether to key the cards by identity, for `--sync`
+    :returns: The file's cards, and its new cache entries (`None` if uncached)
+    """
+    from ..construct import construct_blocks, construct_keyed
+    from ..index import OrgIndex
+    from ..parser import report_skipped
+    from ..renderer import Render
+
+    md = Render(profile=profile)
+    if keyed:
+        with OrgIndex(org_file) as index:
+            cards, constructed = construct_keyed(org_file, index, entries or {}, md)
+        report_skipped(org_file, index.lexer.skipped)
+        return cards, (None if entries is None else constructed)
+
+    if entries is None:
+        return list(read_cards(org_file, mmap, None, md)), None
+
+    current: Dict[str, List[str]] = {}
+    with OrgIndex(org_file) as index:
+        cards = list(construct_blocks(index, entries, current, md))
+    report_skipped(org_file, index.lexer.skipped)
+
+    return cards, current
+
+
+def construct_file_measured(
+    org_file: str,
+    mmap: bool,
+    entries: Optional[Dict[str, List[str]]],
+    profile: str,
+    keyed: bool,
+    measure: bool,
+) -> Tuple[Tuple[Cards, Optional[Dict[str, List[str]]]], Dict[str, Dict[str, Any]]]:
+    """Run `construct_file`, also returning the worker's stage measurements."""
+    STATS.enabled = measure
+    STATS.reset()
+    return construct_file(org_file, mmap, entries, profile, keyed), STATS.as_dict()
+
+
+def parallel_cards(
+    files: List[str],
+    jobs: int,
+    mmap: bool,
+    cache: Optional['CardCache'],
+    profile: str = DEFAULT_PROFILE,
+    keyed: bool = False,
+) -> Iterator[Cards]:
+    """Construct files in a pool of `jobs` processes.
+
+    :param keyed: Whether to key the cards by identity, as `read_keyed_cards`
+    :returns: Iterator of each file's cards, in the order of `files`
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    cached = [None if cache is None else cache.entries(org_file) for org_file in files]
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = executor.map(
+            construct_file_measured,
+            files, repeat(mmap), cached, repeat(profile), repeat(keyed), repeat(STATS.enabled)
+        )
+
+        for org_file, ((cards, entries), stages) in zip(files, results):
+            STATS.merge(stages)
+            if cache is not None:
+                cache.update(org_file, entries)
+            yield cards
+
+
+def serve_main(argv: Optional[List[str]] = None) -> None:
+    """Entry point for `ark-serve`."""
+    parser = argparse.ArgumentParser(prog='ark-serve')
+    parser.add_argument('-d',
+                        '--dry',
+                        action='store_true',
+                        help="Don't open the database; only answer dry requests")
+
+    parser.add_argument('--no-cache',
+                        action='store_true',
+                        help="Render every card, ignoring the card cache")
+
+    parser.add_argument('--socket',
+                        metavar='<path>',
+                        type=str,
+                        help="Listen on this Unix socket, not the default")
+
+    parser.add_argument('--stop',
+                        action='store_true',
+                        help="Stop the running daemon")
+
+    sys.exit(serve(parser.parse_args(argv)))
+
+
+def watch_main(argv: Optional[List[str]] = None) -> None:
+    """Entry point for `ark-watch`."""
+    from ..watch import POLL_INTERVAL, DEBOUNCE
+
+    parser = argparse.ArgumentParser(prog='ark-watch')
+    parser.add_argument('deck',
+                        metavar='<deck>',
+                        type=str,
+                        help='Deck of choice')
+
+    parser.add_argument('directory',
+                        metavar='<dir>',
+                        type=str,
+                        help='Directory of Org files to watch')
+
+    parser.add_argument('-d',
+                        '--dry',
+                        action='store_true',
+                        help="Don't touch the database; just report changed files")
+
+    parser.add_argument('--no-cache',
+                        action='store_true',
+                        help="Render every card, ignoring the card cache")
+
+    parser.add_argument('-s',
+                        '--sync',
+                        action='store_true',
+                        help="Update and delete previously synced cards in place")
+
+    parser.add_argument('--poll',
+                        action='store_true',
+                        help="Poll for changes, even if inotify is available")
+
+    parser.add_argument('--interval',
+                        metavar='<seconds>',
+                        type=float,
+                        default=POLL_INTERVAL,
+                        help="Time between scans, when polling")
+
+    parser.add_argument('--debounce',
+                        metavar='<seconds>',
+                        type=float,
+                        default=DEBOUNCE,
+                        help="Quiet time which ends a burst of changes")
+
+    sys.exit(watch(parser.parse_args(argv)))
+
+
 def main() -> None:
     """Entry point for CLI."""
     parser = argparse.ArgumentParser(prog='ark')
@@ -103,6 +529,81 @@ def main() -> None:
                         action='store_true',
                         help="Don't touch the database; just print parsed results")
 
+    parser.add_argument('-m',
+                        '--mmap',
+                        action='store_true',
+                        help="With --no-cache, memory-map files rather than stream them "
+                             "(the card cache and --sync always do)")
+
+    parser.add_argument('--no-cache',
+                        action='store_true',
+                        help="Render every card, ignoring the card cache")
+
+    parser.add_argument('-j',
+                        '--jobs',
+                        metavar='N',
+                        type=int,
+                        default=1,
+                        help="Lex and render files in N processes")
+
+    parser.add_argument('-s',
+                        '--sync',
+                        action='store_true',
+                        help="Update and delete previously synced cards in place")
+
+    parser.add_argument('--daemon',
+                        action='store_true',
+                        help="Send the files to 'ark-serve', rather than opening the database")
+
+    parser.add_argument('--socket',
+                        metavar='<path>',
+                        type=str,
+                        help="Socket of 'ark-serve', if not the default")
+
+    parser.add_argument('--stats',
+                        action='store_true',
+                        help="Print the time spent in each stage")
+
+    parser.add_argument('--stats-json',
+                        metavar='<path>',
+                        type=str,
+                        help="Write the time spent in each stage to a JSON file")
+
+    parser.add_argument('--profile',
+                        action='store_true',
+                        help="Profile the run, and print the hottest functions")
+
+    parser.add_argument('--profiler',
+                        choices=('cprofile', 'sample'),
+                        default='cprofile',
+                        help="Profile with cProfile (default) or by sampling the stack")
+
+    parser.add_argument('--profile-out',
+                        metavar='<path>',
+                        type=str,
+                        help="Write pstats or collapsed stacks, rather than a summary")
+
     args = parser.parse_args()
+    if args.daemon:
+        # The daemon constructs the cards, with its own cache
+        ignored = [option for option, given in (
+            ('--jobs', args.jobs > 1), ('--mmap', args.mmap), ('--no-cache', args.no_cache)
+        ) if given]
+        if ignored:
+            parser.error(f"{', '.join(ignored)} can't be used with --daemon")
+
+    STATS.enabled = args.stats or (args.stats_json is not None)
+    with STATS.timer('run'):
+        command = push if args.daemon else run
+        if args.profile or (args.profile_out is not None):
+            from ..profiling import profile
+            exit_code = profile(lambda: command(args), args.profiler, args.profile_out)
+        else:
+            exit_code = command(args)
+
+    if args.stats:
+        print(STATS.table())
+    if args.stats_json is not None:
+        STATS.dump(args.stats_json)
 
-    sys.exit(run(args))
+    sys.exit(exit_code)
@@ -14,7 +14,6 @@ import sqlite3
 import subprocess
 from typing import List
 
-from ..ankidb import AnkiDB
 from ..utils import add_anki_searchpath
 from ..config import get_config
 
@@ -31,6 +30,8 @@ def run_pic(args) -> int:
     :returns: Process exit code
     """
     
+    from ..ankidb import AnkiDB
+
     config = get_config()
     if config is None:
         return EXIT_FAILURE
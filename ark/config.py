@@ -5,11 +5,14 @@ Configuration for Ark.
 import os
 import json
 from typing import Dict, Optional
-from xdg import BaseDirectory
 
 
 CONFIG_DIR = "ark"
 CONFIG_FILE = "ark.json"
+CACHE_FILE = "cards.json"
+RENDER_CACHE_FILE = "renders.json"
+SOCKET_FILE = "ark.sock"
+DEFAULT_PROFILE = "full" # Markdown grammar, see `renderer.PROFILES`
 
 
 def get_config() -> Optional[Dict[str, str]]:
@@ -18,6 +21,8 @@ def get_config() -> Optional[Dict[str, str]]:
     :returns: [...]
     :raises KeyError: When [...]
     """
+    from xdg import BaseDirectory
+
     # Get base directory, create if missing
     base_dir = BaseDirectory.save_config_path(CONFIG_DIR)
     config_path = os.path.join(base_dir, CONFIG_FILE)
@@ -31,3 +36,28 @@ def get_config() -> Optional[Dict[str, str]]:
         raise KeyError
 
     return config
+
+
+def get_cache_path(cache_file: str = CACHE_FILE) -> str:
+    """Return the location of a cache, under the XDG cache directory.
+
+    :param cache_file: Name of the cache file, e.g. `CACHE_FILE`
+    :returns: Path to the cache file (which may not exist yet)
+    """
+    from xdg import BaseDirectory
+
+    base_dir = BaseDirectory.save_cache_path(CONFIG_DIR)
+    return os.path.join(base_dir, cache_file)
+
+
+def get_socket_path() -> str:
+    """Return the location of the `ark-serve` socket, under the XDG runtime
+    directory (or PyXDG's per-user fallback, if that is unset).
+
+    :returns: Path to the socket (which may not exist yet)
+    """
+    from xdg import BaseDirectory
+
+    base_dir = os.path.join(BaseDirectory.get_runtime_dir(strict=False), CONFIG_DIR)
+    os.makedirs(base_dir, mode=0o700, exist_ok=True)
+    return os.path.join(base_dir, SOCKET_FILE)
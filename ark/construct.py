@@ -2,12 +2,16 @@
 Construct the HTML-formatted cards.
 """
 
+import os
+import hashlib
 from dataclasses import dataclass
-from typing import List, Tuple, Optional
+from typing import Dict, Iterable, Iterator, List, Tuple, Optional
 
+from .ankidb import IDENTITY_PREFIX
+from .index import OrgIndex
 from .parser import Token
 from .renderer import Render
-from .utils import add_cloze
+from .stats import STATS
 
 
 @dataclass
@@ -31,40 +35,177 @@ class Template:
             return None
 
 
-def construct_cards(tokens: List[Tuple[Token, str]]) -> List[str]:
+def construct_cards(tokens: Iterable[Tuple[Token, str]]) -> List[str]:
     """Construct list of HTML-formatted cards.
     
     :param tokens: List containing a token class and lexeme pair.
     :returns: List of HTML-formatted cards.
     """
-    md = Render()
+    return list(iter_cards(tokens))
+
+
+def iter_cards(
+    tokens: Iterable[Tuple[Token, str]], md: Optional[Render] = None
+) -> Iterator[str]:
+    """Lazily construct HTML-formatted cards, one per card token.
+
+    :param tokens: Iterable of token class and lexeme pairs, e.g. the
+        generator returned by `CardLexer.stream`.
+    :param md: Renderer to use (and share its cache), if not a fresh one.
+    :returns: Iterator of HTML-formatted cards.
+    """
+    md = md or Render()
     headers: Tuple[str, str, str] = ("", "", "")
-    cards: List[str] = []
 
     for token in tokens:
-        if token[0] == Token.HEADER_1:
-            headers = (token[1], "", "")
-        elif token[0] == Token.HEADER_2:
-            headers = (headers[0], token[1], "")
-        elif token[0] == Token.HEADER_3:
-            headers = (headers[0], headers[1], token[1])
-        elif token[0] == Token.CARD:
-            constructed_headers = Template.assemble_headers(headers)
-            body = add_cloze(md.render(token[1]))
-
-            if constructed_headers is None:
-                cards.append(
-                    f'{Template.OPEN_CARD}' 
-                        f'{body}'
-                    f'{Template.CLOSE_CARD}'
-                )
-            else:
-                cards.append(
-                    f'{Template.OPEN_CARD}' 
-                        f'{constructed_headers}'
-                        f'<hr>'
-                        f'{body}'
-                    f'{Template.CLOSE_CARD}'
-                )
-
-    return cards
+        if token[0] == Token.CARD:
+            yield assemble_card(md, headers, token[1])
+        else:
+            headers = advance_headers(headers, token)
+
+
+def construct_blocks(
+    index: OrgIndex,
+    cache: Dict[str, List[str]],
+    entries: Dict[str, List[str]],
+    md: Optional[Render] = None,
+) -> Iterator[str]:
+    """Lazily construct the cards of an indexed Org file, reusing cached
+    blocks; each block is constructed as its first card is needed.
+
+    :param index: Offsets of the file's headings and Anki blocks.
+    :param cache: Previously constructed cards, keyed by `block_key`.
+    :param entries: Filled with the cache entries for the file's current
+        blocks, as they are constructed; complete once the cards are.
+    :param md: Renderer to use (and share its cache), if not a fresh one.
+    :returns: Iterator of HTML-formatted cards.
+    """
+    for key, _, block in iter_blocks(index, cache, md):
+        entries[key] = block
+        yield from block
+
+
+def construct_keyed(
+    org_file: str,
+    index: OrgIndex,
+    cache: Dict[str, List[str]],
+    md: Optional[Render] = None,
+) -> Tuple[Dict[str, str], Dict[str, List[str]]]:
+    """Construct the cards of an indexed Org file, keyed by a stable identity.
+
+    A card's identity is derived from the file, its heading path, the
+    position of its block beneath that heading path, and its position within
+    the block; editing a card's text therefore keeps its identity.
+
+    :param org_file: Path to the Org file.
+    :param index: Offsets of the file's headings and Anki blocks.
+    :param cache: Previously constructed cards, keyed by `block_key`.
+    :param md: Renderer to use (and share its cache), if not a fresh one.
+    :returns: The file's cards by identity, and the cache entries for its
+        current blocks.
+    """
+    scope = file_scope(org_file)
+    positions: Dict[Tuple[str, str, str], int] = {}
+    cards: Dict[str, str] = {}
+    entries: Dict[str, List[str]] = {}
+
+    for key, headers, block in iter_blocks(index, cache, md):
+        entries[key] = block
+        position = positions.get(headers, 0)
+        positions[headers] = position + 1
+
+        for ordinal, card in enumerate(block):
+            digest = hashlib.sha1()
+            for part in headers + (str(position), str(ordinal)):
+                digest.update(part.encode('utf-8'))
+                digest.update(b'\0')
+            cards[f'{scope}{digest.hexdigest()[:16]}'] = card
+
+    return cards, entries
+
+
+def iter_blocks(
+    index: OrgIndex, cache: Dict[str, List[str]], md: Optional[Render] = None
+) -> Iterator[Tuple[str, Tuple[str, str, str], List[str]]]:
+    """Construct the cards of each Anki block, unless already cached.
+
+    :returns: Iterator of each block's key, heading context and cards.
+    """
+    md = md or Render()
+    headers: Tuple[str, str, str] = ("", "", "")
+    seen: Dict[str, List[str]] = {}
+
+    for span in index.spans:
+        if span.token != Token.CARD:
+            headers = advance_headers(headers, (span.token, index.header(span)))
+            continue
+
+        key = block_key(headers, index.buffer[span.start:span.end])
+        block = seen.get(key, cache.get(key))
+        if block is not None:
+            STATS.add('construct.cached', items=len(block))
+        else:
+            block = [
+                assemble_card(md, headers, token[1])
+                for token in index.block_tokens(span)
+            ]
+
+        seen[key] = block
+        yield key, headers, block
+
+
+def file_scope(org_file: str) -> str:
+    """Return the prefix shared by the identities of an Org file's cards."""
+    digest = hashlib.sha1(os.path.abspath(org_file).encode('utf-8'))
+    return f'{IDENTITY_PREFIX}{digest.hexdigest()[:12]}:'
+
+
+def block_key(headers: Tuple[str, str, str], block: bytes) -> str:
+    """Hash an Anki block's raw body together with its heading context."""
+    digest = hashlib.sha1()
+    for header in headers:
+        digest.update(header.encode('utf-8'))
+        digest.update(b'\0')
+    digest.update(block)
+
+    return digest.hexdigest()
+
+
+def advance_headers(
+    headers: Tuple[str, str, str], token: Tuple[Token, str]
+) -> Tuple[str, str, str]:
+    """Return the heading context following a header token."""
+    if token[0] == Token.HEADER_1:
+        return (token[1], "", "")
+    elif token[0] == Token.HEADER_2:
+        return (headers[0], token[1], "")
+    elif token[0] == Token.HEADER_3:
+        return (headers[0], headers[1], token[1])
+    else:
+        return headers
+
+
+def assemble_card(md: Render, headers: Tuple[str, str, str], card: str) -> str:
+    """Render a card's body, and place it beneath its headers."""
+    with STATS.timer('construct', items=1):
+        return _assemble_card(md, headers, card)
+
+
+def _assemble_card(md: Render, headers: Tuple[str, str, str], card: str) -> str:
+    constructed_headers = Template.assemble_headers(headers)
+    body = md.render_card(card)
+
+    if constructed_headers is None:
+        return (
+            f'{Template.OPEN_CARD}' 
+                f'{body}'
+            f'{Template.CLOSE_CARD}'
+        )
+    else:
+        return (
+            f'{Template.OPEN_CARD}' 
+                f'{constructed_headers}'
+                f'<hr>'
+                f'{body}'
+            f'{Template.CLOSE_CARD}'
+        )
@@ -0,0 +1,207 @@
+"""
+Long-running daemon, which keeps the Anki collection and render caches warm.
+
+`ark-serve` listens on a Unix socket; clients (`ark --daemon`) send requests
+as JSON lines, and read one JSON line in response:
+
+    {"deck": "Default", "files": ["/home/user/notes.org"], "sync": false}
+    {"ok": true, "inserted": 3, "updated": 0, "deleted": 0}
+
+Cards may also be sent as Org text, with `"org": "* Heading\\n..."` in place
+of `"files"`. Requests are handled one at a time, so the daemon remains the
+collection's single writer; a connection left idle for `IDLE_TIMEOUT` seconds
+is closed, so it can't hold back other clients.
+"""
+
+import os
+import json
+import socket
+import socketserver
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+# Only the daemon renders; the client (`request`) must start quickly
+if TYPE_CHECKING:
+    from .ankidb import AnkiDB
+    from .cache import CardCache
+    from .renderer import Render
+
+
+IDLE_TIMEOUT = 10.0 # Seconds a connection may wait between requests
+
+
+class Daemon:
+    """
+    Answer `ark --daemon` requests against an open collection.
+
+    :param ankidb: Open collection, or `None` to only render cards (`dry`)
+    :param cache: Card cache to consult and update, or `None`
+    :param md: Renderer shared between requests
+    """
+    def __init__(
+        self, ankidb: Optional['AnkiDB'], cache: Optional['CardCache'], md: 'Render'
+    ):
+        self.ankidb: Optional['AnkiDB'] = ankidb
+        self.cache: Optional['CardCache'] = cache
+        self.md: 'Render' = md
+        self.stopped: bool = False
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Answer a request, reporting any failure in the response."""
+        if not isinstance(request, dict):
+            return {'ok': False, 'error': "Malformed request: expected a JSON object"}
+
+        command = request.get('command', 'push')
+
+        if command == 'ping':
+            return {'ok': True}
+        if command == 'shutdown':
+            self.stopped = True
+            return {'ok': True}
+        if command != 'push':
+            return {'ok': False, 'error': f"Unknown command '{command}'"}
+
+        try:
+            return self.push(request)
+        except FileNotFoundError as file_error:
+            if self.cache is not None and file_error.filename is not None:
+                self.cache.evict(file_error.filename)
+            return {'ok': False, 'error': f"File '{file_error.filename}' doesn't exist"}
+        except KeyError as key_error:
+            return {'ok': False, 'error': f"Request missing field {key_error}"}
+        except ValueError as val_error:
+            return {'ok': False, 'error': str(val_error)}
+        except Exception as error:
+            # A failed request mustn't take down the daemon, and the warm collection
+            return {'ok': False, 'error': f"{type(error).__name__}: {error}"}
+
+    def push(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Construct the request's cards, and insert or sync them."""
+        from .cli.main import read_cards, read_keyed_cards
+        from .construct import iter_cards, file_scope
+        from .parser import CardLexer
+
+        deck = request['deck']
+        sync = request.get('sync', False)
+        dry = request.get('dry', False)
+
+        if self.ankidb is None and not dry:
+            raise ValueError("Daemon was started with '--dry'")
+
+        if 'org' in request:
+            if sync:
+                raise ValueError("Org text can't be synced; send its file instead")
+            batches = [(None, list(iter_cards(CardLexer(request['org']).lex(), self.md)))]
+        elif sync:
+            batches = [(org_file, read_keyed_cards(org_file, self.cache, self.md))
+                       for org_file in request['files']]
+        else:
+            batches = [(org_file, list(read_cards(org_file, False, self.cache, self.md)))
+                       for org_file in request['files']]
+
+        if dry:
+            cards: List[str] = []
+            for _, batch in batches:
+                cards.extend(batch.values() if sync else batch)
+            return {'ok': True, 'cards': cards}
+
+        # One transaction per request; a failure mustn't leave part of it to
+        # be committed by the next
+        inserted = updated = deleted = 0
+        try:
+            for org_file, batch in batches:
+                if sync:
+                    added, changed, removed = self.ankidb.sync_cards(
+                        batch, deck, file_scope(org_file), commit=False
+                    )
+                    inserted, updated, deleted = (
+                        inserted + added, updated + changed, deleted + removed
+                    )
+                else:
+                    inserted += self.ankidb.insert_cards_bulk(batch, deck, commit=False)
+            self.ankidb.commit()
+        except BaseException:
+            self.ankidb.rollback()
+            raise
+
+        return {'ok': True, 'inserted': inserted, 'updated': updated, 'deleted': deleted}
+
+    def save(self) -> None:
+        """Write the caches to disk."""
+        if self.cache is not None:
+            self.cache.save()
+            self.md.save()
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Answer each JSON line of a connection, until it is closed or idle."""
+    def setup(self) -> None:
+        self.timeout = self.server.idle_timeout
+        super().setup()
+
+    def handle(self) -> None:
+        daemon = self.server.daemon
+
+        try:
+            for line in self.rfile:
+                try:
+                    response = daemon.handle(json.loads(line))
+                except json.JSONDecodeError as error:
+                    response = {'ok': False, 'error': f"Malformed request: {error}"}
+
+                self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+                if daemon.stopped:
+                    return
+        except socket.timeout:
+            return
+
+
+def serve(daemon: Daemon, socket_path: str, idle_timeout: float = IDLE_TIMEOUT) -> None:
+    """Answer requests on a Unix socket, until sent `shutdown` or interrupted.
+    The caches are saved on the way out.
+
+    :param daemon: Request handler
+    :param socket_path: Location of the socket; a stale socket is replaced
+    :param idle_timeout: Seconds before an idle connection is closed
+    :raises ValueError: When another daemon is listening on the socket
+    """
+    if os.path.exists(socket_path):
+        try:
+            request(socket_path, {'command': 'ping'})
+        except ConnectionError:
+            os.unlink(socket_path)
+        else:
+            raise ValueError(f"ark daemon already listening on '{socket_path}'")
+
+    server = socketserver.UnixStreamServer(socket_path, _RequestHandler)
+    server.daemon = daemon
+    server.idle_timeout = idle_timeout
+    try:
+        while not daemon.stopped:
+            server.handle_request()
+    finally:
+        server.server_close()
+        os.unlink(socket_path)
+        daemon.save()
+
+
+def request(socket_path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Send a request to the daemon, and return its response.
+
+    :param socket_path: Location of the daemon's socket
+    :param payload: Request, see the module documentation
+    :raises ConnectionError: When no daemon is listening on the socket
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        try:
+            client.connect(socket_path)
+        except FileNotFoundError as error:
+            raise ConnectionRefusedError(error.errno, error.strerror, socket_path)
+
+        client.sendall(json.dumps(payload).encode('utf-8') + b'\n')
+        with client.makefile('rb') as response:
+            line = response.readline()
+
+    if not line:
+        raise ConnectionResetError(f"ark daemon on '{socket_path}' closed the connection")
+
+    return json.loads(line)
@@ -0,0 +1,201 @@
+"""
+Index the headings and Anki blocks of an Org file without decoding it.
+
+The file is memory-mapped and scanned with bytes-level regexes; only the
+heading text and the Anki block bodies are ever decoded into `str`. Lines are
+delimited by `\\n` (a trailing `\\r` is ignored), matching `CardLexer.stream`
+over a file opened in text mode.
+"""
+
+import re
+import sys
+import mmap
+from array import array
+from typing import Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from .parser import CardLexer, Token
+from .stats import STATS
+
+
+HEADERS = {1: Token.HEADER_1, 2: Token.HEADER_2, 3: Token.HEADER_3}
+
+
+class ByteGrammar:
+    """Bytes counterpart of `CardGrammar`, for scanning a whole buffer.
+
+    Patterns begin with the newline that precedes a line, rather than `^`,
+    so the regex engine can skip ahead to candidate lines; `first_line`
+    covers the line at the very start of the buffer.
+    """
+    LINE = (
+        rb'(?:'
+            rb'(?P<leading>\*{1,3})'            # 1-3 stars
+            rb'\ '                              # Separating space
+            rb' *'                              # Any number of leading spaces
+            rb'(?P<header>[^\r\n]+)'            # Header text
+            rb' *'                              # Any number of trailing spaces
+        rb'|'
+            rb' *'                              # Any number of leading spaces
+            rb'(?P<block>#\+begin_src anki)'    # Block start
+            rb' *'                              # Any number of trailing spaces
+        rb')\r?$'                               # End of line
+    )
+    BLOCK_END = (
+        rb' *'                      # Any number of leading spaces
+        rb'#\+end_src'              # Block end
+        rb' *'                      # Any number of trailing spaces
+        rb'\r?$'                    # End of line
+    )
+
+    first_line = re.compile(LINE, flags=re.M)
+    line = re.compile(rb'\n' + LINE, flags=re.M)
+    block_end = re.compile(rb'\n' + BLOCK_END, flags=re.M)
+
+
+class Span(NamedTuple):
+    """Location of a heading's text, or of an Anki block's body (`CARD`)."""
+    token: Token
+    start: int
+    end: int
+
+
+TOKENS = {token.value: token for token in Token}
+
+
+class SpanTable:
+    """
+    Spans of a buffer, stored column-wise: a token code and two offsets per
+    span, 17 bytes in all, rather than an object each. Indexing and iteration
+    give `Span` views.
+    """
+    __slots__ = ('tokens', 'starts', 'ends')
+
+    def __init__(self):
+        self.tokens = array('b')
+        self.starts = array('q')
+        self.ends = array('q')
+
+    def append(self, token: Token, start: int, end: int) -> None:
+        self.tokens.append(token.value)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def __getitem__(self, index: int) -> Span:
+        return Span(TOKENS[self.tokens[index]], self.starts[index], self.ends[index])
+
+    def __iter__(self) -> Iterator[Span]:
+        for code, start, end in zip(self.tokens, self.starts, self.ends):
+            yield Span(TOKENS[code], start, end)
+
+
+class OrgIndex:
+    """
+    Offsets of the headings and Anki blocks within an Org file.
+
+    :param path: Path to the Org file
+    :param buffer: Contents of the file, if already read; otherwise the file
+        is memory-mapped
+    """
+    def __init__(self, path: str, buffer: Optional[bytes] = None):
+        self.path: str = path
+        self.grammar = ByteGrammar()
+        self.lexer = CardLexer()
+        self.spans: SpanTable = SpanTable()
+        self.buffer: Union[mmap.mmap, bytes] = self._map(path) if buffer is None else buffer
+
+        with STATS.timer('index', items=1):
+            self._scan()
+
+    def __enter__(self) -> 'OrgIndex':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @staticmethod
+    def _map(path: str) -> Union[mmap.mmap, bytes]:
+        with open(path, 'rb') as fd:
+            try:
+                return mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped
+                return b''
+
+    def close(self) -> None:
+        """Release the memory map."""
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+    def tokens(self) -> Iterator[Tuple[Token, str]]:
+        """Yield the same token stream as `CardLexer.stream` over the file."""
+        for span in self.spans:
+            if span.token == Token.CARD:
+                yield from self.block_tokens(span)
+            else:
+                yield (span.token, self.header(span))
+
+    def text(self, span: Span) -> str:
+        """Decode the text of a span."""
+        text = self.buffer[span.start:span.end].decode('utf-8')
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+
+        return text
+
+    def header(self, span: Span) -> str:
+        """Decode a heading's text, interned: a vault repeats the same
+        headings (e.g. 'Examples') many times over."""
+        return sys.intern(self.text(span))
+
+    def block_tokens(self, span: Span) -> List[Tuple[Token, str]]:
+        """Split an Anki block into its valid cards; skipped cards are
+        recorded in `self.lexer.skipped`, with their line in the file."""
+        skipped = len(self.lexer.skipped)
+        tokens = self.lexer.block_tokens(self.block_lines(span))
+
+        # Lines are counted only for blocks with something to report
+        if len(self.lexer.skipped) > skipped:
+            offset = self.line_number(span) - 1
+            self.lexer.skipped[skipped:] = [
+                card._replace(line=card.line + offset) for card in self.lexer.skipped[skipped:]
+            ]
+
+        return tokens
+
+    def line_number(self, span: Span) -> int:
+        """Return the line (from 1) on which a span begins."""
+        return self.buffer[:span.start].count(b'\n') + 1
+
+    def block_lines(self, span: Span) -> List[str]:
+        """Decode an Anki block into the lines consumed by `parse_block`."""
+        return self.text(span).splitlines(keepends=True)
+
+    def _scan(self) -> None:
+        """Record the heading and block spans, in file order."""
+        buffer = self.buffer
+        size = len(buffer)
+        line = self.grammar.first_line.match(buffer)
+        if line is None:
+            line = self.grammar.line.search(buffer)
+
+        while line is not None:
+            if line.group('block') is None:
+                level = len(line.group('leading'))
+                self.spans.append(HEADERS[level], line.start('header'), line.end('header'))
+                line = self.grammar.line.search(buffer, line.end())
+                continue
+
+            # The body begins on the line following `#+begin_src anki`, and
+            # `line.end()` is the newline which ends that line
+            end = self.grammar.block_end.search(buffer, line.end())
+            start = min(line.end() + 1, size)
+
+            if end is None:
+                self.spans.append(Token.CARD, start, size)
+                break
+
+            self.spans.append(Token.CARD, start, end.start() + 1)
+            line = self.grammar.line.search(buffer, end.end())
@@ -28,6 +28,16 @@ _escape_pattern = re.compile(r'&(?!#?\w+;)')
 _newline_pattern = re.compile(r'\r\n|\r')
 _block_quote_leading_pattern = re.compile(r'^ *> ?', flags=re.M)
 _block_code_leading_pattern = re.compile(r'^ {4}', re.M)
+_list_loose_pattern = re.compile(r'\n\n(?!\s*$)')
+_table_trailing_pattern = re.compile(r'(?: *\| *)?\n$')
+_table_trailing_newline_pattern = re.compile(r'\n$')
+_table_row_pattern = re.compile(r'^ *\| *| *\| *$')
+_table_cell_pattern = re.compile(r' *(?<!\\)\| *')
+_table_header_pattern = re.compile(r'^ *| *\| *$')
+_table_align_row_pattern = re.compile(r' *|\| *$')
+_table_split_pattern = re.compile(r' *\| *')
+_table_align_pattern = re.compile(r' *(:?)-+(:?) *$')
+_table_aligns = {('', ':'): 'right', (':', ':'): 'center', (':', ''): 'left'}
 _inline_tags = [
     'a', 'em', 'strong', 'small', 's', 'cite', 'q', 'dfn', 'abbr', 'data',
     'time', 'code', 'var', 'samp', 'kbd', 'sub', 'sup', 'i', 'b', 'u', 'mark',
@@ -48,6 +58,157 @@ def _pure_pattern(regex):
     return pattern
 
 
+_cursor_patterns = {}
+
+
+def _cursor_pattern(regex):
+    """Return the equivalent of ``regex`` for ``regex.match(text, pos)``.
+
+    A rule is written to match at the start of the remaining text. Matching
+    in place, a top-level ``^`` (or ``\\A``) would only match at the start
+    of the whole text, so is dropped: ``match`` is anchored at ``pos``. A
+    leading ``\\b`` or ``\\B`` would see the character before ``pos``, so
+    is rewritten as the lookahead it amounts to at the start of a string.
+    """
+    cursor = _cursor_patterns.get(regex)
+    if cursor is None:
+        cursor = re.compile(_strip_anchors(regex.pattern), regex.flags)
+        _cursor_patterns[regex] = cursor
+    return cursor
+
+
+def _strip_anchors(pattern):
+    """Drop the anchors starting each top-level alternative of a pattern."""
+    out = []
+    depth = 0
+    alternative = True  # At the start of a top-level alternative
+    i = 0
+
+    while i < len(pattern):
+        c = pattern[i]
+        if alternative:
+            if c == '^' or pattern.startswith('\\A', i):
+                i += 1 if c == '^' else 2
+                continue
+            if pattern.startswith('\\b', i):
+                out.append('(?=\\w)')
+                i += 2
+                continue
+            if pattern.startswith('\\B', i):
+                out.append('(?!\\w)')
+                i += 2
+                continue
+            alternative = False
+
+        if c == '\\':
+            out.append(pattern[i:i + 2])
+            i += 2
+            continue
+
+        if c == '[':
+            # Copy the class whole; `^` and `]` are literal at its start
+            end = i + 1
+            if pattern[end:end + 1] == '^':
+                end += 1
+            if pattern[end:end + 1] == ']':
+                end += 1
+            while pattern[end] != ']':
+                end += 2 if pattern[end] == '\\' else 1
+            out.append(pattern[i:end + 1])
+            i = end + 1
+            continue
+
+        if c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+        elif c == '|' and depth == 0:
+            alternative = True
+        out.append(c)
+        i += 1
+
+    return ''.join(out)
+
+
+class _RuleDispatch(dict):
+    """Each rule's in-place match and the lexer's handler for it, keyed by
+    the character at the cursor; only the rules which can start with that
+    character are tried. Filled in as characters are met."""
+
+    def __init__(self, lexer, rules, method):
+        super(_RuleDispatch, self).__init__()
+        starts = getattr(lexer.rules, 'starts', {})
+        self.candidates = [
+            (_rule_start(starts.get(name)),
+             _cursor_pattern(getattr(lexer.rules, name)).match,
+             getattr(lexer, method % name))
+            for name in rules
+        ]
+
+        # The steps of characters which can only start text, when the lexer
+        # can skip to the end of the text itself (see `InlineLexer.output`)
+        self.plain = None
+        if (getattr(lexer.rules, 'text_end', None) is not None
+                and rules and rules[-1] == 'text'
+                and type(lexer).output_text is InlineLexer.output_text):
+            self.plain = [self.candidates[-1][1:]]
+
+    def __missing__(self, char):
+        steps = [
+            (match, handler) for start, match, handler in self.candidates
+            if start is None or start(char)
+        ]
+        if steps == self.plain:
+            steps = self.plain
+        self[char] = steps
+        return steps
+
+
+_rule_starts = {}
+
+
+def _rule_start(pattern):
+    """Return the match of a rule's first-character class, or ``None`` if
+    the rule may start with any character."""
+    if pattern is None:
+        return None
+    start = _rule_starts.get(pattern)
+    if start is None:
+        start = _rule_starts[pattern] = re.compile(pattern).match
+    return start
+
+
+def _cursor_steps(lexer, rules, method):
+    """Return the lexer's rule dispatch, memoised as a lexer is called once
+    per block and span."""
+    key = tuple(rules)
+    steps = lexer._cursor_steps.get(key)
+    if steps is None:
+        steps = lexer._cursor_steps[key] = _RuleDispatch(lexer, key, method)
+    return steps
+
+
+def _join(placeholder, fragments):
+    """Concatenate rendered fragments onto a renderer's placeholder."""
+    if isinstance(placeholder, str):
+        return placeholder + ''.join(fragments)
+    for fragment in fragments:
+        placeholder += fragment
+    return placeholder
+
+
+_outdent_patterns = {}
+
+
+def _outdent_pattern(space):
+    """Return the pattern removing up to ``space`` spaces of indentation
+    from each line of a list item."""
+    pattern = _outdent_patterns.get(space)
+    if pattern is None:
+        pattern = _outdent_patterns[space] = re.compile(r'^ {1,%d}' % space, flags=re.M)
+    return pattern
+
+
 def _keyify(key):
     key = escape(key.lower(), quote=True)
     return _key_pattern.sub(' ', key)
@@ -120,6 +281,7 @@ class BlockGrammar(object):
     block_quote = re.compile(r'^( *>[^\n]+(\n[^\n]+)*\n*)+')
     list_block = re.compile(
         r'^( *)(?=[*+-]|\d+\.)(([*+-])?(?:\d+\.)?) [\s\S]+?'
+        r'(?=\n|\s*\Z)'  # every ending below starts at a newline, or the end
         r'(?:'
         r'\n+(?=\1?(?:[-*_] *){3,}(?:\n+|$))'  # hrule
         r'|\n+(?=%s)'  # def links
@@ -171,6 +333,23 @@ class BlockGrammar(object):
     text = re.compile(r'^[^\n]+')
     block_math = re.compile(r'^\$\$(.*?)\$\$', re.DOTALL)
 
+    # Characters each rule can start with, as a character class; rules not
+    # listed may start with any character
+    starts = {
+        'newline': r'\n',
+        'hrule': r'[ \-*_]',
+        'block_code': r' ',
+        'fences': r'[ `~]',
+        'heading': r'[ #]',
+        'block_quote': r'[ >]',
+        'list_block': r'[ *+\-\d]',
+        'block_html': r'[ <]',
+        'def_links': r'[ \[]',
+        'block_math': r'\$',
+        'def_footnotes': r'\[',
+        'table': r'[ |]',
+    }
+
 
 class BlockLexer(object):
     """Block level lexer for block grammars."""
@@ -203,6 +382,8 @@ class BlockLexer(object):
             rules = self.grammar_class()
 
         self.rules = rules
+        self.cursor = kwargs.get('cursor', True)
+        self._cursor_steps = {}
 
     def __call__(self, text, rules=None):
         return self.parse(text, rules)
@@ -213,6 +394,27 @@ class BlockLexer(object):
         if not rules:
             rules = self.default_rules
 
+        if not self.cursor:
+            return self._parse_sliced(text, rules)
+
+        # Rules match in place, so the remaining text is never copied
+        steps = _cursor_steps(self, rules, 'parse_%s')
+        pos = 0
+        end = len(text)
+
+        while pos < end:
+            for match, parse in steps[text[pos]]:
+                m = match(text, pos)
+                if m:
+                    parse(m)
+                    pos = m.end()
+                    break
+            else:  # pragma: no cover
+                raise RuntimeError('Infinite loop at: %s' % text[pos:])
+        return self.tokens
+
+    def _parse_sliced(self, text, rules):
+        """Reference lexer: slice each match off the text."""
         def manipulate(text):
             for key in rules:
                 rule = getattr(self.rules, key)
@@ -304,12 +506,11 @@ class BlockLexer(object):
             # outdent
             if '\n ' in item:
                 space = space - len(item)
-                pattern = re.compile(r'^ {1,%d}' % space, flags=re.M)
-                item = pattern.sub('', item)
+                item = _outdent_pattern(space).sub('', item)
 
             # determine whether item is loose or not
             loose = _next
-            if not loose and re.search(r'\n\n(?!\s*$)', item):
+            if not loose and '\n\n' in item and _list_loose_pattern.search(item):
                 loose = True
 
             rest = len(item)
@@ -379,11 +580,11 @@ class BlockLexer(object):
     def parse_table(self, m):
         item = self._process_table(m)
 
-        cells = re.sub(r'(?: *\| *)?\n$', '', m.group(3))
-        cells = cells.split('\n')
-        for i, v in enumerate(cells):
-            v = re.sub(r'^ *\| *| *\| *$', '', v)
-            cells[i] = re.split(r' *(?<!\\)\| *', v)
+        cells = _table_trailing_pattern.sub('', m.group(3))
+        cells = [
+            _table_cell_pattern.split(_table_row_pattern.sub('', v))
+            for v in cells.split('\n')
+        ]
 
         item['cells'] = self._process_cells(cells)
         self.tokens.append(item)
@@ -391,29 +592,22 @@ class BlockLexer(object):
     def parse_nptable(self, m):
         item = self._process_table(m)
 
-        cells = re.sub(r'\n$', '', m.group(3))
-        cells = cells.split('\n')
-        for i, v in enumerate(cells):
-            cells[i] = re.split(r' *(?<!\\)\| *', v)
+        cells = _table_trailing_newline_pattern.sub('', m.group(3))
+        cells = [_table_cell_pattern.split(v) for v in cells.split('\n')]
 
         item['cells'] = self._process_cells(cells)
         self.tokens.append(item)
 
     def _process_table(self, m):
-        header = re.sub(r'^ *| *\| *$', '', m.group(1))
-        header = re.split(r' *\| *', header)
-        align = re.sub(r' *|\| *$', '', m.group(2))
-        align = re.split(r' *\| *', align)
+        header = _table_header_pattern.sub('', m.group(1))
+        header = _table_split_pattern.split(header)
+        align = _table_align_row_pattern.sub('', m.group(2))
+        align = _table_split_pattern.split(align)
 
         for i, v in enumerate(align):
-            if re.search(r'^ *-+: *$', v):
-                align[i] = 'right'
-            elif re.search(r'^ *:-+: *$', v):
-                align[i] = 'center'
-            elif re.search(r'^ *:-+ *$', v):
-                align[i] = 'left'
-            else:
-                align[i] = None
+            # colons on either side of the dashes
+            colons = _table_align_pattern.match(v)
+            align[i] = colons and _table_aligns.get(colons.groups())
 
         item = {
             'type': 'table',
@@ -423,10 +617,11 @@ class BlockLexer(object):
         return item
 
     def _process_cells(self, cells):
-        for i, line in enumerate(cells):
+        for line in cells:
             for c, cell in enumerate(line):
                 # de-escape any pipe inside the cell here
-                cells[i][c] = re.sub(r'\\\\\|', '|', cell)
+                if '\\' in cell:
+                    line[c] = cell.replace('\\\\|', '|')
 
         return cells
 
@@ -498,9 +693,32 @@ class InlineGrammar(object):
     code = re.compile(r'^(`+)\s*([\s\S]*?[^`])\s*\1(?!`)')  # `code`
     linebreak = re.compile(r'^ {2,}\n(?!\s*$)')
     strikethrough = re.compile(r'^~~(?=\S)([\s\S]*?\S)~~')  # ~~word~~
+    cloze = re.compile(r'^~~(?!~)([\s\S]*?[^~])~~')  # ~~deletion~~
     footnote = re.compile(r'^\[\^([^\]]+)\]')
     # text = re.compile(r'^[\s\S]+?(?=[\\<!\[_*`~]|https?://| {2,}\n|$)')
     text = re.compile(r'^[\s\S]+?(?=[\\<!\[_*`~\$]|https?://| {2,}\n|$)')
+    # Where `text` ends, short of the end of the string
+    text_end = re.compile(r'[\\<!\[_*`~\$]|https?://| {2,}\n')
+
+    # Characters each rule can start with, as a character class; rules not
+    # listed may start with any character
+    starts = {
+        'escape': r'\\',
+        'inline_html': r'<',
+        'autolink': r'<',
+        'url': r'h',
+        'footnote': r'\[',
+        'link': r'[!\[]',
+        'reflink': r'[!\[]',
+        'nolink': r'[!\[]',
+        'double_emphasis': r'[_*]',
+        'emphasis': r'[_*]',
+        'code': r'`',
+        'math': r'\$',
+        'linebreak': r'[ \n]',  # Either grammar, see `hard_wrap`
+        'strikethrough': r'~',
+        'cloze': r'~',
+    }
 
     def hard_wrap(self):
         """Grammar for hard wrap linebreak. You don't need to add two
@@ -510,6 +728,7 @@ class InlineGrammar(object):
         self.text = re.compile(
             r'^[\s\S]+?(?=[\\<!\[_*`~]|https?://| *\n|$)'
         )
+        self.text_end = re.compile(r'[\\<!\[_*`~]|https?://| *\n')
 
 
 class InlineLexer(object):
@@ -520,12 +739,12 @@ class InlineLexer(object):
         'escape', 'inline_html', 'autolink', 'url',
         'footnote', 'link', 'reflink', 'nolink',
         'double_emphasis', 'emphasis', 'code',
-        'math', 'linebreak', 'strikethrough', 'text',
+        'math', 'linebreak', 'cloze', 'text',
     ]
     inline_html_rules = [
         'escape', 'inline_html', 'autolink', 'url', 'link', 'reflink',
         'nolink', 'double_emphasis', 'emphasis', 'code',
-        'linebreak', 'strikethrough', 'text',
+        'linebreak', 'cloze', 'text',
     ]
 
     def __init__(self, renderer, rules=None, **kwargs):
@@ -546,6 +765,8 @@ class InlineLexer(object):
         self._in_link = False
         self._in_footnote = False
         self._parse_inline_html = kwargs.get('parse_inline_html')
+        self.cursor = kwargs.get('cursor', True)
+        self._cursor_steps = {}
 
     def __call__(self, text, rules=None):
         return self.output(text, rules)
@@ -563,6 +784,46 @@ class InlineLexer(object):
         if self._in_footnote and 'footnote' in rules:
             rules.remove('footnote')
 
+        if not self.cursor:
+            return self._output_sliced(text, rules)
+
+        # Rules match in place, so the remaining text is never copied
+        steps = _cursor_steps(self, rules, 'output_%s')
+        plain = steps.plain
+        if plain is not None:
+            text_end = self.rules.text_end.search
+        fragments = []
+        pos = 0
+        end = len(text)
+
+        while pos < end:
+            candidates = steps[text[pos]]
+            if candidates is plain:
+                # No markup starts here: skip to the next character which
+                # could start some, rendering the text between in one go
+                m = text_end(text, pos + 1)
+                stop = m.start() if m else end
+                fragments.append(self.renderer.text(text[pos:stop]))
+                pos = stop
+                continue
+
+            for match, output in candidates:
+                m = match(text, pos)
+                if not m:
+                    continue
+                self.line_match = m
+                out = output(m)
+                if out is not None:
+                    fragments.append(out)
+                    pos = m.end()
+                    break
+            else:  # pragma: no cover
+                raise RuntimeError('Infinite loop at: %s' % text[pos:])
+
+        return _join(self.renderer.placeholder(), fragments)
+
+    def _output_sliced(self, text, rules):
+        """Reference lexer: slice each match off the text."""
         output = self.renderer.placeholder()
 
         def manipulate(text):
@@ -685,6 +946,10 @@ class InlineLexer(object):
         text = self.output(m.group(1))
         return self.renderer.strikethrough(text)
 
+    def output_cloze(self, m):
+        text = self.output(m.group(1))
+        return self.renderer.cloze(text)
+
     def output_text(self, m):
         text = m.group(0)
         return self.renderer.text(text)
@@ -692,10 +957,33 @@ class InlineLexer(object):
 
 class Renderer(object):
     """The default HTML renderer for rendering Markdown.
+
+    With the ``sequential_cloze`` option, cloze deletions are numbered
+    ``c1``, ``c2``... in the order they are rendered; otherwise each is
+    ``c1``.
     """
 
     def __init__(self, **kwargs):
         self.options = kwargs
+        self.cloze_number = 1  # of the next deletion; reset by Markdown.parse
+
+    def next_cloze(self, deletions=1):
+        """Return the number of the next of ``deletions`` cloze deletions."""
+        if not self.options.get('sequential_cloze'):
+            return 1
+        number = self.cloze_number
+        self.cloze_number += deletions
+        return number
+
+    def add_cloze(self, text):
+        """Convert the ~~deletions~~ of raw text (code, math, HTML), which
+        isn't lexed, numbering them in turn; see ``utils.add_cloze``."""
+        if not self.options.get('sequential_cloze'):
+            return utils.add_cloze(text)
+        delimiters = text.count(utils.CUST_DELIM)
+        if not delimiters or delimiters % 2:
+            return text
+        return utils.add_cloze(text, self.next_cloze(delimiters // 2), sequential=True)
 
     def placeholder(self):
         """Returns the default, empty output value for the renderer.
@@ -721,11 +1009,11 @@ class Renderer(object):
         if not lang:
             code = escape(code, smart_amp=False)
             text = '<pre><code>{}\n</code></pre>\n'.format(code)
-            return utils.add_cloze(text)
+            return self.add_cloze(text)
         else:
             code = escape(code, quote=True, smart_amp=False)
             text = '<pre><code class="lang-{}">{}\n</code></pre>\n'.format(lang, code)
-            return utils.add_cloze(text)
+            return self.add_cloze(text)
 
     def block_quote(self, text):
         """Rendering <blockquote> with the given text.
@@ -743,8 +1031,8 @@ class Renderer(object):
            html.lower().startswith('<style'):
             return ''
         if self.options.get('escape'):
-            return escape(html)
-        return html
+            return self.add_cloze(escape(html))
+        return self.add_cloze(html)
 
     def header(self, text, level, raw=None):
         """Rendering header/heading tags like ``<h1>`` ``<h2>``.
@@ -836,13 +1124,13 @@ class Renderer(object):
         :param text: text content for inline code.
         """
         text = escape(text.rstrip(), smart_amp=False)
-        return '<code>%s</code>' % text
+        return '<code>%s</code>' % self.add_cloze(text)
 
     def math(self, text):
-        return r'[latex]\scriptsize$%s$[/latex]' % text
+        return r'[latex]\scriptsize$%s$[/latex]' % self.add_cloze(text)
 
     def block_math(self, text):
-        return '[latex]$%s$[/latex]' % text
+        return '[latex]$%s$[/latex]' % self.add_cloze(text)
 
     def linebreak(self):
         """Rendering line break like ``<br>``."""
@@ -855,8 +1143,16 @@ class Renderer(object):
 
         :param text: text content for strikethrough.
         """
-        # return '<del>%s</del>' % text
-        return utils.segment_section(text)
+        return '<del>%s</del>' % text
+
+    def cloze(self, text):
+        """Rendering a ~~cloze~~ deletion, with each word (and each part
+        of a compound word) deleted separately.
+
+        :param text: rendered content of the deletion.
+        """
+        start = utils.ANKI_OPEN.format(self.next_cloze())
+        return utils.segment_section(text, start, utils.ANKI_END)
 
     def text(self, text):
         """Rendering unformatted text.
@@ -922,8 +1218,8 @@ class Renderer(object):
         :param html: text content of the html snippet.
         """
         if self.options.get('escape'):
-            return escape(html)
-        return html
+            return self.add_cloze(escape(html))
+        return self.add_cloze(html)
 
     def newline(self):
         """Rendering newline element."""
@@ -992,7 +1288,7 @@ class Markdown(object):
         else:
             self.inline = InlineLexer(renderer, **kwargs)
 
-        self.block = block or BlockLexer(BlockGrammar())
+        self.block = block or BlockLexer(BlockGrammar(), **kwargs)
         self.footnotes = []
         self.tokens = []
 
@@ -1010,6 +1306,7 @@ class Markdown(object):
         return self.parse(text)
 
     def parse(self, text):
+        self.renderer.cloze_number = 1
         out = self.output(preprocessing(text))
 
         keys = self.block.def_footnotes
@@ -1030,12 +1327,13 @@ class Markdown(object):
             footnotes, key=lambda o: keys.get(o['key']), reverse=True
         )
 
-        body = self.renderer.placeholder()
+        items = []
         while self.footnotes:
             note = self.footnotes.pop()
-            body += self.renderer.footnote_item(
+            items.append(self.renderer.footnote_item(
                 note['key'], note['text']
-            )
+            ))
+        body = _join(self.renderer.placeholder(), items)
 
         out += self.renderer.footnotes(body)
         return out
@@ -1057,10 +1355,10 @@ class Markdown(object):
 
         self.inline.setup(self.block.def_links, self.block.def_footnotes)
 
-        out = self.renderer.placeholder()
+        fragments = []
         while self.pop():
-            out += self.tok()
-        return out
+            fragments.append(self.tok())
+        return _join(self.renderer.placeholder(), fragments)
 
     def tok(self):
         t = self.token['type']
@@ -1072,10 +1370,10 @@ class Markdown(object):
         return getattr(self, 'output_%s' % t)()
 
     def tok_text(self):
-        text = self.token['text']
+        lines = [self.token['text']]
         while self.peek()['type'] == 'text':
-            text += '\n' + self.pop()['text']
-        return self.inline(text)
+            lines.append(self.pop()['text'])
+        return self.inline('\n'.join(lines))
 
     def output_newline(self):
         return self.renderer.newline()
@@ -1098,64 +1396,72 @@ class Markdown(object):
     def output_table(self):
         aligns = self.token['align']
         aligns_length = len(aligns)
-        cell = self.renderer.placeholder()
+        cells = []
 
         # header part
         header = self.renderer.placeholder()
         for i, value in enumerate(self.token['header']):
             align = aligns[i] if i < aligns_length else None
             flags = {'header': True, 'align': align}
-            cell += self.renderer.table_cell(self.inline(value), **flags)
+            cells.append(self.renderer.table_cell(self.inline(value), **flags))
 
+        cell = _join(self.renderer.placeholder(), cells)
         header += self.renderer.table_row(cell)
 
         # body part
-        body = self.renderer.placeholder()
+        rows = []
         for i, row in enumerate(self.token['cells']):
-            cell = self.renderer.placeholder()
+            cells = []
             for j, value in enumerate(row):
                 align = aligns[j] if j < aligns_length else None
                 flags = {'header': False, 'align': align}
-                cell += self.renderer.table_cell(self.inline(value), **flags)
-            body += self.renderer.table_row(cell)
+                cells.append(self.renderer.table_cell(self.inline(value), **flags))
+            cell = _join(self.renderer.placeholder(), cells)
+            rows.append(self.renderer.table_row(cell))
+        body = _join(self.renderer.placeholder(), rows)
 
         return self.renderer.table(header, body)
 
     def output_block_quote(self):
-        body = self.renderer.placeholder()
+        fragments = []
         while self.pop()['type'] != 'block_quote_end':
-            body += self.tok()
+            fragments.append(self.tok())
+        body = _join(self.renderer.placeholder(), fragments)
         return self.renderer.block_quote(body)
 
     def output_list(self):
         ordered = self.token['ordered']
-        body = self.renderer.placeholder()
+        fragments = []
         while self.pop()['type'] != 'list_end':
-            body += self.tok()
+            fragments.append(self.tok())
+        body = _join(self.renderer.placeholder(), fragments)
         return self.renderer.list(body, ordered)
 
     def output_list_item(self):
-        body = self.renderer.placeholder()
+        fragments = []
         while self.pop()['type'] != 'list_item_end':
             if self.token['type'] == 'text':
-                body += self.tok_text()
+                fragments.append(self.tok_text())
             else:
-                body += self.tok()
+                fragments.append(self.tok())
 
+        body = _join(self.renderer.placeholder(), fragments)
         return self.renderer.list_item(body)
 
     def output_loose_item(self):
-        body = self.renderer.placeholder()
+        fragments = []
         while self.pop()['type'] != 'list_item_end':
-            body += self.tok()
+            fragments.append(self.tok())
+        body = _join(self.renderer.placeholder(), fragments)
         return self.renderer.list_item(body)
 
     def output_footnote(self):
         self.inline._in_footnote = True
-        body = self.renderer.placeholder()
+        fragments = []
         key = self.token['key']
         while self.pop()['type'] != 'footnote_end':
-            body += self.tok()
+            fragments.append(self.tok())
+        body = _join(self.renderer.placeholder(), fragments)
         self.footnotes.append({'key': key, 'text': body})
         self.inline._in_footnote = False
         return self.renderer.placeholder()
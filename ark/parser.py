@@ -5,8 +5,9 @@ See `test/test_parsing.py` for an example of the syntax.
 """
 
 import re
+import sys
 from enum import Enum, auto
-from typing import List, Tuple
+from typing import Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple
 
 
 class Token(Enum):
@@ -17,6 +18,12 @@ class Token(Enum):
     HEADER_3 = auto()
 
 
+class SkippedCard(NamedTuple):
+    """A card left out of the token stream, and why."""
+    line: int
+    reason: str
+
+
 class CardGrammar:
     """Grammar for the primary constructs."""
     heading = re.compile(
@@ -45,22 +52,75 @@ class CardGrammar:
         r'$'                        # End of line
     )
 
+    card_separator = re.compile(
+        r'^'                        # Beginning of line
+            r' *'                   # Any number of leading spaces
+            r'---'                  # Separator
+            r'.*'                   # Rest of the line, which is ignored
+        r'(?:\n|$)',                # End of line
+        flags=re.M
+    )
+
 
 class CardLexer:
     """Tokenise the input into the appropriate classes."""
-    def __init__(self, org_input: str):
+    def __init__(self, org_input: str = ""):
         self.grammar = CardGrammar()
         self.rules = ['heading', 'block_start', 'block_end']
-        self.CARD_SEPARATOR = (r' *' r'---')
 
         self.org_input = org_input
         self.tokens: List[Tuple[Token, str]] = []
+        self.skipped: List[SkippedCard] = []
 
         self.lines = self.org_input.splitlines(keepends=True)
         self.lines.reverse()
+        self.line_count = len(self.lines)
 
     def lex(self) -> List[Tuple[Token, str]]:
         """Iterate over each line of input, and parse the section."""
+        self.tokens.extend(self.stream(reversed(self.lines)))
+        self.lines.clear()
+
+        return self.tokens
+
+    def stream(self, lines: Iterable[str]) -> Iterator[Tuple[Token, str]]:
+        """Lazily tokenise an iterable of lines, e.g. an open file object.
+
+        Each line is classified once by its first significant character:
+        only lines beginning with `*` are tried as headings, and only lines
+        beginning with `#` (after indentation) are tried as block starts.
+        Prose lines are skipped without running a regex. At most one Anki
+        block is buffered at a time.
+        """
+        heading = self.grammar.heading
+        block_start = self.grammar.block_start
+        block_end = self.grammar.block_end
+        numbered = enumerate(lines, 1)
+
+        for number, line in numbered:
+            lead = line[:1]
+
+            if lead == '*':
+                pattern = heading.match(line)
+                if pattern:
+                    token = self.heading_token(pattern)
+                    if token is not None:
+                        yield token
+            elif lead == '#' or (lead == ' ' and line.lstrip(' ')[:1] == '#'):
+                if block_start.match(line):
+                    card_buffer: List[str] = []
+                    for _, line in numbered:
+                        if block_end.match(line):
+                            break
+                        card_buffer.append(line)
+
+                    yield from self.block_tokens(card_buffer, number + 1)
+
+    def lex_rules(self) -> List[Tuple[Token, str]]:
+        """Reference lexer: try every rule in `self.rules` against each line.
+
+        Produces the same token stream as `lex`; kept for differential testing.
+        """
         while len(self.lines) > 0:
             line = self.lines.pop()
 
@@ -82,20 +142,29 @@ class CardLexer:
 
     def parse_heading(self, pattern):
         """Append the appropriate header to the token stream."""
+        token = self.heading_token(pattern)
+        if token is not None:
+            self.tokens.append(token)
+
+    def heading_token(self, pattern) -> Optional[Tuple[Token, str]]:
+        """Return the header token for a heading match."""
         header_prefix = pattern.groupdict()['leading']
-        header = pattern.groupdict()['header']
+        header = sys.intern(pattern.groupdict()['header'])
 
         if len(header_prefix) == 1:
-            self.tokens.append((Token.HEADER_1, header))
+            return (Token.HEADER_1, header)
         elif len(header_prefix) == 2:
-            self.tokens.append((Token.HEADER_2, header))
+            return (Token.HEADER_2, header)
         elif len(header_prefix) == 3:
-            self.tokens.append((Token.HEADER_3, header))
+            return (Token.HEADER_3, header)
+        else:
+            return None
 
     def parse_block_start(self, pattern):
         """Extract the Anki block.""" 
         card_buffer: List[str] = []
         block_end_pattern = self.grammar.block_end
+        first_line = self.line_count - len(self.lines) + 1
 
         while len(self.lines) > 0:
             line = self.lines.pop()
@@ -105,33 +174,52 @@ class CardLexer:
             else:
                 break
 
-        self.parse_block(card_buffer)
+        self.parse_block(card_buffer, first_line)
         
-    def parse_block(self, card_buffer: List[str]):
+    def parse_block(self, card_buffer: List[str], first_line: int = 1):
         """Parse the individual card."""
-        cards: List[str] = []
-        interim_card: List[str] = []
-        
-        for line in card_buffer:
-            if re.match(self.CARD_SEPARATOR, line) is not None:
-                cards.append("".join(interim_card))
-                interim_card.clear()
-            else:
-                interim_card.append(line)
-        
-        if len(interim_card) > 0:
-            cards.append("".join(interim_card))
-        
+        self.tokens.extend(self.block_tokens(card_buffer, first_line))
+
+    def block_tokens(
+        self, card_buffer: List[str], first_line: int = 1
+    ) -> List[Tuple[Token, str]]:
+        """Split an Anki block into its valid cards.
+
+        The block is split on its separator lines in one pass, and each card's
+        cloze delimiters counted as it is split off. Cards without a cloze
+        deletion, or with an unbalanced one, are recorded in `self.skipped`;
+        empty cards (e.g. after a trailing separator) are dropped silently.
+
+        :param card_buffer: Lines of the block's body
+        :param first_line: Line number of the body's first line, for `skipped`
+        :returns: Card tokens
+        """
+        tokens: List[Tuple[Token, str]] = []
+        line = first_line
+
         # TODO: Add more preprocessing: spellcheck, valid parentheses, etc.
-        for card in cards:
+        for card in self.grammar.card_separator.split("".join(card_buffer)):
+            card_line = line
+            line += card.count('\n') + 1 # Including the separator line
+
             if (len(card) == 0) or (card.isspace()):
-                # TODO: Add warning message
-                continue
-            elif card.count('~~') == 0:
-                # TODO: Add warning message
-                continue
-            elif card.count('~~') % 2 != 0:
-                # TODO: Add warning message
                 continue
+
+            delimiters = card.count('~~')
+            if delimiters == 0:
+                self.skipped.append(SkippedCard(card_line, "no cloze deletion ('~~')"))
+            elif delimiters % 2 != 0:
+                self.skipped.append(SkippedCard(card_line, "unbalanced cloze deletion ('~~')"))
             else:
-                self.tokens.append((Token.CARD, card))
+                tokens.append((Token.CARD, card))
+
+        return tokens
+
+
+def report_skipped(
+    org_file: str, skipped: Iterable[SkippedCard], stream: Optional[TextIO] = None
+) -> None:
+    """Print a warning for each skipped card of an Org file (to stderr)."""
+    for card in skipped:
+        print(f"Warning: {org_file}:{card.line}: Skipped card with {card.reason}.",
+              file=stream or sys.stderr)
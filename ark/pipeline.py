@@ -0,0 +1,240 @@
+"""
+Asynchronous ingestion of Org files, for embedding ark in an asyncio service.
+
+The stages run concurrently, connected by bounded queues:
+
+    read (threads) -> construct (executor) -> write (one database thread)
+
+so a slow stage holds back those before it, and memory stays flat however
+many files are ingested. Cards are written by a single coroutine, which
+batches them into transactions of `batch_size` cards, or whatever has
+arrived within `batch_interval` seconds.
+"""
+
+import time
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from .ankidb import AnkiDB
+from .cache import CardCache
+from .config import DEFAULT_PROFILE
+from .construct import construct_blocks, construct_keyed, file_scope
+from .index import OrgIndex
+from .parser import report_skipped
+from .renderer import Render
+from .stats import STATS
+
+
+QUEUE_SIZE = 16 # Files in flight between two stages
+BATCH_SIZE = 500 # Cards per transaction
+BATCH_INTERVAL = 1.0 # Seconds before a partial batch is committed
+WORKERS = 4 # Files constructed concurrently
+
+_DONE = None # Queue sentinel, once a stage has no more files
+
+Cards = Union[List[str], Dict[str, str]]
+
+
+@dataclass
+class Ingested:
+    """Summary of an `ingest`."""
+    files: int = 0
+    cards: int = 0
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+    transactions: int = 0
+
+
+def read_file(org_file: str) -> bytes:
+    """Read an Org file."""
+    with open(org_file, 'rb') as fd:
+        return fd.read()
+
+
+def construct_buffer(
+    org_file: str,
+    buffer: bytes,
+    entries: Dict[str, List[str]],
+    sync: bool,
+    profile: str = DEFAULT_PROFILE,
+) -> Tuple[Cards, Dict[str, List[str]]]:
+    """Construct the cards of a read Org file; run in the executor, so takes
+    and returns the file's cache entries rather than the cache.
+
+    :returns: The file's cards (keyed by identity, if `sync`), and its new
+        cache entries
+    """
+    md = Render(profile=profile)
+    with OrgIndex(org_file, buffer) as index:
+        if sync:
+            constructed = construct_keyed(org_file, index, entries, md)
+        else:
+            current: Dict[str, List[str]] = {}
+            constructed = list(construct_blocks(index, entries, current, md)), current
+    report_skipped(org_file, index.lexer.skipped)
+
+    return constructed
+
+
+def write_batch(
+    ankidb: AnkiDB, batch: List[Tuple[str, Cards]], deck: str, sync: bool
+) -> Tuple[int, int, int]:
+    """Write the cards of several files in one transaction.
+
+    :returns: Number of notes inserted, updated and deleted
+    """
+    inserted = updated = deleted = 0
+    if sync:
+        for org_file, cards in batch:
+            added, changed, removed = ankidb.sync_cards(
+                cards, deck, file_scope(org_file), commit=False
+            )
+            inserted, updated, deleted = inserted + added, updated + changed, deleted + removed
+    else:
+        inserted = ankidb.insert_cards_bulk(
+            (card for _, cards in batch for card in cards), deck, commit=False
+        )
+
+    ankidb.commit()
+    return inserted, updated, deleted
+
+
+async def ingest(
+    files: Iterable[str],
+    deck: str,
+    open_db: Optional[Callable[[], AnkiDB]],
+    cache: Optional[CardCache] = None,
+    sync: bool = False,
+    executor: Optional[Executor] = None,
+    workers: int = WORKERS,
+    queue_size: int = QUEUE_SIZE,
+    batch_size: int = BATCH_SIZE,
+    batch_interval: float = BATCH_INTERVAL,
+    profile: str = DEFAULT_PROFILE,
+) -> Ingested:
+    """Read, construct and write Org files concurrently.
+
+    The collection is opened, used and committed on a thread of its own
+    (SQLite connections belong to the thread which opened them), so it is
+    passed as a function which opens it. Files are written in the order their
+    construction completes.
+
+    :param files: Org files to ingest
+    :param deck: Deck for inserted notes
+    :param open_db: Function opening the collection, e.g.
+        `lambda: AnkiDB(anki, path)`; or `None` to only construct the cards
+    :param cache: Card cache to consult and update, or `None`
+    :param sync: Whether to sync (see `AnkiDB.sync_cards`), rather than insert
+    :param executor: Executor for construction, e.g. a `ProcessPoolExecutor`;
+        `None` for the event loop's default
+    :param workers: Files constructed concurrently
+    :param queue_size: Files held between two stages
+    :param batch_size: Cards which fill a transaction
+    :param batch_interval: Seconds before a partial transaction is committed
+    :param profile: Grammar to render with, see `renderer.PROFILES`; the
+        cache must have been rendered with the same
+    :returns: Summary of the ingestion
+    """
+    loop = asyncio.get_running_loop()
+    read: asyncio.Queue = asyncio.Queue(queue_size)
+    constructed: asyncio.Queue = asyncio.Queue(queue_size)
+    ingested = Ingested()
+
+    async def reader() -> None:
+        for org_file in files:
+            buffer = await loop.run_in_executor(None, read_file, org_file)
+            await read.put((org_file, buffer))
+
+        for _ in range(workers):
+            await read.put(_DONE)
+
+    async def constructor() -> None:
+        while True:
+            item = await read.get()
+            if item is _DONE:
+                await constructed.put(_DONE)
+                return
+
+            org_file, buffer = item
+            entries = {} if cache is None else cache.entries(org_file)
+            with STATS.timer('pipeline.construct', items=1):
+                cards, entries = await loop.run_in_executor(
+                    executor, construct_buffer, org_file, buffer, entries, sync, profile
+                )
+
+            if cache is not None:
+                cache.update(org_file, entries)
+            await constructed.put((org_file, cards))
+
+    async def writer(database: Executor) -> None:
+        ankidb = None
+        if open_db is not None:
+            ankidb = await loop.run_in_executor(database, open_db)
+
+        batch: List[Tuple[str, Cards]] = []
+        size = 0
+        deadline = None
+        running = workers
+
+        async def commit() -> None:
+            nonlocal batch, size, deadline
+            if ankidb is not None:
+                with STATS.timer('pipeline.write', items=size):
+                    counts = await loop.run_in_executor(
+                        database, write_batch, ankidb, batch, deck, sync
+                    )
+                ingested.inserted += counts[0]
+                ingested.updated += counts[1]
+                ingested.deleted += counts[2]
+                ingested.transactions += 1
+            batch, size, deadline = [], 0, None
+
+        # Kept across timeouts, so an item arriving as the deadline passes isn't lost
+        getter = None
+        try:
+            while running:
+                if getter is None:
+                    getter = asyncio.ensure_future(constructed.get())
+
+                timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+                done, _ = await asyncio.wait({getter}, timeout=timeout)
+                if not done:
+                    await commit()
+                    continue
+
+                item, getter = getter.result(), None
+                if item is _DONE:
+                    running -= 1
+                    continue
+
+                batch.append(item)
+                size += len(item[1])
+                ingested.files += 1
+                ingested.cards += len(item[1])
+                if deadline is None:
+                    deadline = time.monotonic() + batch_interval
+                if size >= batch_size:
+                    await commit()
+        finally:
+            if getter is not None:
+                getter.cancel()
+
+        if batch:
+            await commit()
+
+    with ThreadPoolExecutor(max_workers=1) as database:
+        tasks = [asyncio.ensure_future(reader()), asyncio.ensure_future(writer(database))]
+        tasks.extend(asyncio.ensure_future(constructor()) for _ in range(workers))
+
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    return ingested
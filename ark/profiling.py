@@ -0,0 +1,88 @@
+"""
+Profile an ark run, under `cProfile` or a lightweight sampling profiler.
+
+The sampling profiler interrupts the process on `SIGPROF` (so is Unix only)
+and records the Python stack, written out in the collapsed-stack format read
+by flame graph tools: one `outer;...;inner <count>` line per distinct stack.
+Only the main process is profiled; `--jobs` workers are not.
+"""
+
+import os
+import sys
+import signal
+from collections import Counter
+from typing import Any, Callable, Optional
+
+
+PROFILERS = ('cprofile', 'sample')
+SAMPLE_INTERVAL = 0.001 # Seconds of CPU time between samples
+SUMMARY_LINES = 25
+
+
+class Sampler:
+    """Sample the main thread's stack on a CPU-time interval timer."""
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+
+    def start(self) -> None:
+        if not hasattr(signal, 'setitimer'):
+            raise ValueError("Sampling profiler requires a Unix platform")
+
+        signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self) -> None:
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, signal.SIG_DFL)
+
+    def collapsed(self, limit: Optional[int] = None) -> str:
+        """Return the samples as collapsed stacks, most frequent first."""
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.stacks.most_common(limit)
+        )
+
+    def _sample(self, signum: int, frame: Any) -> None:
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+
+        self.stacks[";".join(reversed(names))] += 1
+
+
+def profile(function: Callable[[], Any], profiler: str, out: Optional[str]) -> Any:
+    """Call `function` under a profiler, and report the profile.
+
+    :param function: Function to profile
+    :param profiler: One of `PROFILERS`
+    :param out: Path for pstats (`cprofile`) or collapsed stacks (`sample`);
+        if `None`, the most significant entries are printed instead
+    :returns: The function's result
+    """
+    if profiler == 'cprofile':
+        import cProfile
+        import pstats
+
+        recorder = cProfile.Profile()
+        try:
+            return recorder.runcall(function)
+        finally:
+            if out is not None:
+                recorder.dump_stats(out)
+            else:
+                stats = pstats.Stats(recorder, stream=sys.stdout)
+                stats.sort_stats('cumulative').print_stats(SUMMARY_LINES)
+
+    sampler = Sampler()
+    sampler.start()
+    try:
+        return function()
+    finally:
+        sampler.stop()
+        if out is not None:
+            with open(out, 'w') as fd:
+                fd.write(sampler.collapsed())
+        else:
+            sys.stdout.write(sampler.collapsed(SUMMARY_LINES))
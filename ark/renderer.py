@@ -3,9 +3,17 @@ Renderers to translate from custom Markdown format into HTML, with Anki syntax
 interspersed.
 """
 
+import os
 import re
+import json
+import hashlib
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional
 from .mistune import Markdown, Renderer, escape
-from .utils import add_cloze
+from .mistune.mistune import BlockGrammar, BlockLexer, InlineLexer, _pure_pattern
+from .config import DEFAULT_PROFILE
+from .stats import STATS
 
 
 CODE_BLOCK = (
@@ -17,10 +25,27 @@ CODE_BLOCK = (
 )
 
 
+LEXER_CACHE_SIZE = 32
+RENDER_CACHE_SIZE = 4096
+RENDER_CACHE_VERSION = 2
+
+
+@lru_cache(maxsize=LEXER_CACHE_SIZE)
+def cached_lexer(get_lexer_by_name, lang):
+    """Return the (reusable) Pygments lexer for a language."""
+    return get_lexer_by_name(lang, stripall=True)
+
+
+@lru_cache(maxsize=1)
+def shared_formatter(html):
+    """Return the HTML formatter shared by every highlighted code block."""
+    return html.HtmlFormatter()
+
+
 class HighLightRenderer(Renderer):
     """Override the code block parsing to add syntax highlighting."""
-    def __init__(self, highlight, get_lexer_by_name, html):
-        super().__init__()
+    def __init__(self, highlight, get_lexer_by_name, html, **kwargs):
+        super().__init__(**kwargs)
         self.highlight = highlight
         self.get_lexer_by_name = get_lexer_by_name
         self.html = html
@@ -28,27 +53,175 @@ class HighLightRenderer(Renderer):
     def block_code(self, code, lang):
         """Add syntax highlighting to code block using Pygments."""
         if not lang:
-            return '\n<pre><code>{}</code></pre>\n'.format(escape(code))
+            return '\n<pre><code>{}</code></pre>\n'.format(self.add_cloze(escape(code)))
         else:
-            lexer = self.get_lexer_by_name(lang, stripall=True)
-            formatter = self.html.HtmlFormatter()
-            return self.highlight(code, lexer, formatter)
+            with STATS.timer('render.pygments', items=1):
+                lexer = cached_lexer(self.get_lexer_by_name, lang)
+                formatter = shared_formatter(self.html)
+                return self.add_cloze(self.highlight(code, lexer, formatter))
+
+
+class CardBlockGrammar(BlockGrammar):
+    """Block grammar of `CardBlockLexer`; a paragraph only ends at the
+    blocks it lexes."""
+    paragraph = re.compile(
+        r'^((?:[^\n]+\n?(?!'
+        r'%s|%s|%s|%s|%s'
+        r'))+)\n*' % (
+            _pure_pattern(BlockGrammar.fences).replace(r'\1', r'\2'),
+            _pure_pattern(BlockGrammar.list_block).replace(r'\1', r'\3'),
+            _pure_pattern(BlockGrammar.hrule),
+            _pure_pattern(BlockGrammar.heading),
+            _pure_pattern(BlockGrammar.block_quote),
+        )
+    )
+
+
+class CardBlockLexer(BlockLexer):
+    """Block lexer for the Markdown cards are written in: prose, lists,
+    quotes, code, math and `|`-delimited tables. HTML blocks, setext
+    headings, tables without leading pipes, and link and footnote
+    definitions are left as paragraphs."""
+    grammar_class = CardBlockGrammar
+
+    default_rules = [
+        'newline', 'hrule', 'block_code', 'fences', 'heading',
+        'block_quote', 'list_block', 'block_math', 'table',
+        'paragraph', 'text',
+    ]
+
+    list_rules = (
+        'newline', 'block_code', 'fences', 'hrule',
+        'block_quote', 'list_block', 'text',
+    )
+
+
+class CardInlineLexer(InlineLexer):
+    """Inline lexer for `CardBlockLexer`: without link or footnote
+    definitions, references can only render as text."""
+    default_rules = [
+        'escape', 'inline_html', 'autolink', 'url', 'link',
+        'double_emphasis', 'emphasis', 'code',
+        'math', 'linebreak', 'cloze', 'text',
+    ]
+
+
+# Grammars cards may be rendered with, by name; selected by `profile` in the
+# configuration file
+PROFILES = {
+    'full': (BlockLexer, InlineLexer),
+    'card': (CardBlockLexer, CardInlineLexer),
+}
 
 
 class Render:
-    def __init__(self):
+    """
+    Render cards' Markdown into HTML.
+
+    Final card bodies are memoised in a content-addressed LRU cache, which
+    can optionally be persisted between runs.
+
+    :param cache_size: Maximum number of card bodies to memoise
+    :param cache_path: JSON file to load the cache from, and `save` it to
+    :param profile: Grammar to render with, one of `PROFILES`
+    :raises ValueError: When the profile is unknown
+    """
+    def __init__(
+        self,
+        cache_size: int = RENDER_CACHE_SIZE,
+        cache_path: Optional[str] = None,
+        profile: str = DEFAULT_PROFILE,
+    ):
+        if profile not in PROFILES:
+            raise ValueError(
+                f"Unknown profile '{profile}'; expected one of {', '.join(PROFILES)}"
+            )
+
+        self.profile = profile
+        self.block, self.inline = PROFILES[profile]
         self.renderer = None
-        self.md = Markdown()
+        self.md = Markdown(block=self.block, inline=self.inline)
+        self.highlight_md = None
         self.code_block = re.compile(CODE_BLOCK)
 
+        self.cache: OrderedDict = OrderedDict()
+        self.cache_size = cache_size
+        self.cache_path = cache_path
+        self.hits = 0
+        self.misses = 0
+
+        if cache_path is not None:
+            self._load()
+
     def render(self, card: str) -> str:
+        with STATS.timer('render.markdown', items=1):
+            return self._render(card)
+
+    def _render(self, card: str) -> str:
+        if self.code_block.search(card) is None:
+            return self.md.render(card)
+
         # Dynamically load pygments lexing; only if needed
-        if self.code_block.search(card) is not None:
+        if self.highlight_md is None:
             from pygments import highlight
             from pygments.lexers import get_lexer_by_name
             from pygments.formatters import html
 
             self.renderer = HighLightRenderer(highlight, get_lexer_by_name, html)
-            self.md = Markdown(renderer=self.renderer)
+            self.highlight_md = Markdown(
+                renderer=self.renderer, block=self.block, inline=self.inline
+            )
+
+        return self.highlight_md.render(card)
+
+    def render_card(self, card: str) -> str:
+        """Render a card's body into its final HTML, with Anki cloze
+        deletions; identical bodies are only rendered once."""
+        key = hashlib.sha1(card.encode('utf-8')).hexdigest()
+        body = self.cache.get(key)
+
+        if body is not None:
+            self.hits += 1
+            STATS.add('render.cache.hit')
+            self.cache.move_to_end(key)
+            return body
+
+        self.misses += 1
+        STATS.add('render.cache.miss')
+        body = self.render(card)
+        self.cache[key] = body
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False) # Evict the least-recently used
+
+        return body
+
+    def save(self) -> None:
+        """Write the cache to `cache_path`, atomically replacing it."""
+        if self.cache_path is None:
+            return
+
+        interim_path = f'{self.cache_path}.tmp'
+        with open(interim_path, 'w') as fd:
+            json.dump({
+                'version': RENDER_CACHE_VERSION,
+                'profile': self.profile,
+                'bodies': list(self.cache.items()),
+            }, fd)
+
+        os.replace(interim_path, self.cache_path)
+
+    def _load(self) -> None:
+        """Read the cache; a missing, corrupt or outdated cache, or one
+        rendered with another profile, is discarded."""
+        try:
+            with open(self.cache_path) as fd:
+                cache = json.load(fd)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+
+        if not isinstance(cache, dict) or cache.get('version') != RENDER_CACHE_VERSION:
+            return
+        if cache.get('profile', DEFAULT_PROFILE) != self.profile:
+            return
 
-        return self.md.render(card)
+        self.cache.update(cache['bodies'][-self.cache_size:])
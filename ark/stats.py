@@ -0,0 +1,123 @@
+"""
+Wall time and counters for the stages of an ark run.
+
+Stages record into the process-wide `STATS`, which does nothing until
+enabled (e.g. by `ark --stats`). Times are inclusive: a stage which drives
+another, such as `construct` pulling tokens from `lex`, includes its time.
+"""
+
+import time
+import json
+from typing import Any, Dict, Iterable, Iterator, TypeVar
+
+
+T = TypeVar('T')
+
+
+class Stage:
+    """Accumulated measurements of a stage.
+
+    A plain class, rather than a dataclass: `dataclasses` imports `inspect`,
+    which would dominate the start-up time of `ark`.
+    """
+    __slots__ = ('seconds', 'calls', 'items')
+
+    def __init__(self, seconds: float = 0.0, calls: int = 0, items: int = 0):
+        self.seconds = seconds
+        self.calls = calls
+        self.items = items
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {'seconds': self.seconds, 'calls': self.calls, 'items': self.items}
+
+
+class Timer:
+    """Context manager adding its wall time to a stage."""
+    def __init__(self, stats: 'Stats', name: str, items: int):
+        self.stats = stats
+        self.name = name
+        self.items = items
+        self.start = 0.0
+
+    def __enter__(self) -> 'Timer':
+        if self.stats.enabled:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self.stats.enabled:
+            self.stats.add(self.name, time.perf_counter() - self.start, 1, self.items)
+
+
+class Stats:
+    """Registry of stages, keyed by name (e.g. `anki.addNote`)."""
+    def __init__(self):
+        self.enabled: bool = False
+        self.stages: Dict[str, Stage] = {}
+
+    def add(self, name: str, seconds: float = 0.0, calls: int = 1, items: int = 0) -> None:
+        """Add measurements to a stage."""
+        if not self.enabled:
+            return
+
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = Stage()
+
+        stage.seconds += seconds
+        stage.calls += calls
+        stage.items += items
+
+    def timer(self, name: str, items: int = 0) -> Timer:
+        """Time a block: `with STATS.timer('render'): ...`."""
+        return Timer(self, name, items)
+
+    def iterate(self, name: str, iterable: Iterable[T]) -> Iterator[T]:
+        """Time the production of each item of a (lazy) iterable; the whole
+        iteration counts as one call."""
+        if not self.enabled:
+            yield from iterable
+            return
+
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add(name, time.perf_counter() - start, 1, 0)
+                return
+            self.add(name, time.perf_counter() - start, 0, 1)
+            yield item
+
+    def reset(self) -> None:
+        """Discard all measurements."""
+        self.stages.clear()
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Return the measurements as plain data, e.g. for JSON."""
+        return {name: stage.as_dict() for name, stage in self.stages.items()}
+
+    def merge(self, stages: Dict[str, Dict[str, Any]]) -> None:
+        """Add measurements taken elsewhere, e.g. in a worker process."""
+        for name, stage in stages.items():
+            self.add(name, stage['seconds'], stage['calls'], stage['items'])
+
+    def table(self) -> str:
+        """Return the measurements as a summary table, slowest first."""
+        lines = [f"{'stage':<24} {'calls':>8} {'items':>8} {'seconds':>10}"]
+        ordered = sorted(self.stages.items(), key=lambda stage: -stage[1].seconds)
+        for name, stage in ordered:
+            lines.append(
+                f"{name:<24} {stage.calls:>8} {stage.items:>8} {stage.seconds:>10.4f}"
+            )
+
+        return "\n".join(lines)
+
+    def dump(self, path: str) -> None:
+        """Write the measurements to a JSON file."""
+        with open(path, 'w') as fd:
+            json.dump(self.as_dict(), fd, indent=2)
+
+
+STATS = Stats()
@@ -8,6 +8,7 @@ import copy
 
 
 ANKI_START = '{{c1::'
+ANKI_OPEN = '{{{{c{}::'
 ANKI_END = '}}'
 CUST_DELIM = '~~'
 
@@ -21,8 +22,35 @@ def add_anki_searchpath() -> None:
     sys.path.append(module_path)
 
 
-def add_cloze(text: str) -> str:
-    """Replace custom enclosing characters with Anki delimiters."""
+def add_cloze(text: str, number: int = 1, sequential: bool = False) -> str:
+    """Replace custom enclosing characters with Anki delimiters.
+
+    The text is split on the delimiter in a single pass; unbalanced text is
+    returned unconverted.
+
+    :param text: Text with deletions enclosed by `CUST_DELIM`
+    :param number: Cloze number of the (first) deletion, i.e. `c<number>`
+    :param sequential: Number successive deletions `c<number>`, `c<number+1>`...
+    """
+    sections = text.split(CUST_DELIM)
+    if len(sections) % 2 == 0:
+        return text
+
+    # Interleave the sections with alternating opening and closing tags
+    deletions = len(sections) // 2
+    converted = [ANKI_END] * (2 * len(sections) - 1)
+    converted[0::2] = sections
+    if sequential:
+        converted[1::4] = [ANKI_OPEN.format(n) for n in range(number, number + deletions)]
+    else:
+        converted[1::4] = [ANKI_OPEN.format(number)] * deletions
+
+    return "".join(converted)
+
+
+def add_cloze_chars(text: str) -> str:
+    """Reference, per-character implementation of `add_cloze`; kept for
+    differential testing and benchmarks."""
     flip = True
     chars = list(text)
 
@@ -35,13 +63,8 @@ def add_cloze(text: str) -> str:
     return "".join(chars) if (flip == True) else text
 
 
-def segment_section(text: str) -> str:
+def segment_section(text: str, start: str = CUST_DELIM, end: str = CUST_DELIM) -> str:
     """Split each cloze section on whitespace, make each individual word (and
-    compound word) into its own section.""" 
-    words = [CUST_DELIM + word + CUST_DELIM for word in text.split()]
-    new = []
-
-    for word in words:
-        new.append(word.replace("-", f"{CUST_DELIM}-{CUST_DELIM}"))
-
-    return " ".join(new)
+    compound word) into its own section, enclosed by `start` and `end`."""
+    hyphen = f"{end}-{start}"
+    return " ".join(start + word.replace("-", hyphen) + end for word in text.split())
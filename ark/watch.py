@@ -0,0 +1,244 @@
+"""
+Watch a directory tree of Org files, and re-sync each file as it changes.
+
+Changes are read from inotify when the optional `inotify_simple` package is
+installed, and otherwise found by polling each file's modification time and
+size. A burst of saves is debounced into one batch, whose cards are written
+to the collection in a single transaction.
+"""
+
+import os
+import time
+from typing import TYPE_CHECKING, Dict, Iterator, Optional, Set, Tuple, Union
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+
+if TYPE_CHECKING:
+    from .ankidb import AnkiDB
+    from .cache import CardCache
+    from .renderer import Render
+
+
+ORG_SUFFIX = '.org'
+POLL_INTERVAL = 1.0 # Seconds between scans of the tree, when polling
+DEBOUNCE = 0.25 # Seconds without a change which end a batch
+
+
+def scan(root: str) -> Dict[str, Tuple[int, int]]:
+    """Return the modification time (ns) and size of each Org file in a tree."""
+    files = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if not name.endswith(ORG_SUFFIX):
+                continue
+
+            path = os.path.join(directory, name)
+            try:
+                status = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files[path] = (status.st_mtime_ns, status.st_size)
+
+    return files
+
+
+class PollingWatcher:
+    """
+    Find changed Org files by comparing scans of the tree.
+
+    :param root: Directory to watch
+    :param interval: Seconds between scans
+    """
+    def __init__(self, root: str, interval: float = POLL_INTERVAL):
+        self.root: str = root
+        self.interval: float = interval
+        self.snapshot: Dict[str, Tuple[int, int]] = scan(root)
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        """Wait for Org files to be changed, created or deleted.
+
+        :param timeout: Seconds to wait, or `None` to wait indefinitely
+        :returns: Paths of the changed files; empty on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            snapshot = scan(self.root)
+            changed = {
+                path for path in snapshot.keys() | self.snapshot.keys()
+                if snapshot.get(path) != self.snapshot.get(path)
+            }
+            self.snapshot = snapshot
+            if changed:
+                return changed
+
+            if deadline is None:
+                time.sleep(self.interval)
+            else:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return set()
+                time.sleep(min(self.interval, remaining))
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """
+    Find changed Org files through inotify, watching every directory of the
+    tree (including those created later).
+
+    :param root: Directory to watch
+    """
+    def __init__(self, root: str):
+        self.inotify = INotify()
+        self.directories: Dict[int, str] = {}
+        self.mask = (
+            flags.CLOSE_WRITE | flags.MOVED_TO | flags.MOVED_FROM
+            | flags.CREATE | flags.DELETE
+        )
+
+        for directory, _, _ in os.walk(root):
+            self._watch(directory)
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        """Wait for Org files to be changed, created or deleted.
+
+        :param timeout: Seconds to wait, or `None` to wait indefinitely
+        :returns: Paths of the changed files; empty on timeout
+        """
+        milliseconds = None if timeout is None else int(timeout * 1000)
+        changed: Set[str] = set()
+
+        for event in self.inotify.read(timeout=milliseconds):
+            directory = self.directories.get(event.wd)
+            if event.mask & flags.IGNORED:
+                self.directories.pop(event.wd, None)
+                continue
+            if directory is None:
+                continue
+
+            path = os.path.join(directory, event.name)
+            if event.mask & flags.ISDIR:
+                if event.mask & (flags.CREATE | flags.MOVED_TO):
+                    # Files may already be inside, e.g. when a directory is moved in
+                    for subdirectory, _, _ in os.walk(path):
+                        self._watch(subdirectory)
+                    changed.update(scan(path))
+            elif path.endswith(ORG_SUFFIX) and not event.mask & flags.CREATE:
+                # Creation is followed by `CLOSE_WRITE`, once the file is written
+                changed.add(path)
+
+        return changed
+
+    def close(self) -> None:
+        self.inotify.close()
+
+    def _watch(self, directory: str) -> None:
+        try:
+            descriptor = self.inotify.add_watch(directory, self.mask)
+        except FileNotFoundError:
+            return
+        self.directories[descriptor] = directory
+
+
+Watcher = Union[PollingWatcher, InotifyWatcher]
+
+
+def open_watcher(root: str, poll: bool = False, interval: float = POLL_INTERVAL) -> Watcher:
+    """Watch a tree with inotify, if available, or else by polling.
+
+    :param root: Directory to watch
+    :param poll: Whether to poll, even if inotify is available
+    :param interval: Seconds between scans, when polling
+    :raises ValueError: When `root` isn't a directory
+    """
+    if not os.path.isdir(root):
+        raise ValueError(f"'{root}' isn't a directory")
+
+    if INotify is None or poll:
+        return PollingWatcher(root, interval)
+
+    return InotifyWatcher(root)
+
+
+def batches(watcher: Watcher, debounce: float = DEBOUNCE) -> Iterator[Set[str]]:
+    """Yield each burst of changed files, once `debounce` seconds pass without
+    a further change."""
+    while True:
+        batch = watcher.wait()
+        while True:
+            more = watcher.wait(debounce)
+            if not more:
+                break
+            batch |= more
+
+        yield batch
+
+
+def sync_files(
+    paths: Set[str],
+    deck: str,
+    ankidb: Optional['AnkiDB'],
+    cache: Optional['CardCache'],
+    md: 'Render',
+    sync: bool = False,
+) -> Tuple[Dict[str, int], int, int, int]:
+    """Construct a batch of changed files, and write their cards in one
+    transaction. Deleted files have their notes deleted when syncing, and are
+    otherwise ignored.
+
+    :param paths: Changed Org files
+    :param deck: Deck for inserted notes
+    :param ankidb: Collection, or `None` to only construct the cards
+    :param cache: Card cache to consult and update, or `None`
+    :param md: Renderer shared between batches
+    :param sync: Whether to sync (see `AnkiDB.sync_cards`), rather than insert
+    :returns: Number of cards per file; and of notes inserted, updated and deleted
+    """
+    from .cli.main import read_cards, read_keyed_cards
+    from .construct import file_scope
+
+    counts: Dict[str, int] = {}
+    inserted = updated = deleted = 0
+    pending = []
+
+    for path in sorted(paths):
+        if sync:
+            try:
+                cards = read_keyed_cards(path, cache, md)
+            except FileNotFoundError:
+                cards = {}
+                if cache is not None:
+                    cache.evict(path)
+            counts[path] = len(cards)
+
+            if ankidb is not None:
+                added, changed, removed = ankidb.sync_cards(
+                    cards, deck, file_scope(path), commit=False
+                )
+                inserted, updated, deleted = inserted + added, updated + changed, deleted + removed
+        else:
+            try:
+                cards = list(read_cards(path, False, cache, md))
+            except FileNotFoundError:
+                if cache is not None:
+                    cache.evict(path)
+                continue
+            counts[path] = len(cards)
+            pending.extend(cards)
+
+    if ankidb is not None:
+        if pending:
+            inserted += ankidb.insert_cards_bulk(pending, deck, commit=False)
+        ankidb.commit()
+
+    if cache is not None:
+        cache.save()
+        md.save()
+
+    return counts, inserted, updated, deleted
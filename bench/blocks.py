@@ -0,0 +1,82 @@
+"""
+Measure how lexing and rendering lists, block quotes and tables scale: lists
+nested up to `--depth` levels deep, quotes nested as deep, and tables of up
+to `--rows` rows. Time per character should stay flat as a block grows.
+
+    python3 bench/blocks.py --depth 6 --rows 500
+"""
+
+import time
+import argparse
+from typing import Callable, List
+
+from ark.mistune import Markdown
+
+
+def nested_list(items: int, depth: int) -> str:
+    """`items` top-level items, each opening a list `depth` levels deep, of
+    three items per level."""
+    lines = []
+    for n in range(items):
+        for level in range(depth):
+            for i in range(3):
+                lines.append(f"{'  ' * level}- Item {n}.{level}.{i}, with *some* `code`")
+    return "\n".join(lines) + "\n"
+
+
+def nested_quote(lines: int, depth: int) -> str:
+    """A block quote of `lines` lines, `depth` levels deep."""
+    return "".join(f"{'> ' * depth}Quoted line {n}, with *emphasis*\n" for n in range(lines))
+
+
+def table(rows: int) -> str:
+    """A table of `rows` rows, aligned three ways."""
+    head = "| Left | Centre | Right |\n|:-----|:------:|------:|\n"
+    return head + "".join(f"| a{n} | `b{n}` | c \\\\| {n} |\n" for n in range(rows))
+
+
+def best(run: Callable[[], object], repeat: int) -> float:
+    """Return the fastest of `repeat` runs, in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def report(name: str, size: int, text: str, repeat: int) -> None:
+    md = Markdown()
+    lexed = best(lambda: md.block(text), repeat)
+    rendered = best(lambda: md.render(text), repeat)
+    print(f"{name:<8} {size:>6} {len(text):>8} {lexed * 1e3:>10.2f} {rendered * 1e3:>10.2f}"
+          f" {rendered / len(text) * 1e6:>9.3f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog='bench/blocks.py')
+    parser.add_argument('--depth', type=int, default=6, help='Deepest list and quote nesting')
+    parser.add_argument('--rows', type=int, default=500, help='Rows of the largest table')
+    parser.add_argument('--chars', type=int, default=20000, help='Size of each nested fixture')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement')
+    args = parser.parse_args()
+
+    print(f"{'block':<8} {'size':>6} {'chars':>8} {'lex (ms)':>10} {'render (ms)':>10}"
+          f" {'us/char':>9}")
+    for depth in range(1, args.depth + 1):
+        # Roughly the same number of characters at every depth
+        items = max(args.chars // (len(nested_list(1, depth)) or 1), 1)
+        report('list', depth, nested_list(items, depth), args.repeat)
+
+    for depth in range(1, args.depth + 1):
+        lines = max(args.chars // len(nested_quote(1, depth)), 1)
+        report('quote', depth, nested_quote(lines, depth), args.repeat)
+
+    sizes: List[int] = sorted({max(args.rows // 8, 1), max(args.rows // 4, 1),
+                               max(args.rows // 2, 1), args.rows})
+    for rows in sizes:
+        report('table', rows, table(rows), args.repeat)
+
+
+if __name__ == '__main__':
+    main()
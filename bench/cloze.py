@@ -0,0 +1,38 @@
+"""
+Benchmark `utils.add_cloze` against the per-character reference.
+
+Usage: python3 bench/cloze.py [--repeat N]
+"""
+
+import argparse
+import timeit
+
+from ark.utils import add_cloze, add_cloze_chars
+
+
+def card_body(size: int) -> str:
+    """Return rendered card HTML of roughly `size` characters."""
+    paragraph = '<p>The ~~quick~~ brown fox jumps over the ~~lazy~~ dog.</p>\n'
+    return paragraph * (size // len(paragraph) + 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog='bench/cloze.py')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repetitions')
+    args = parser.parse_args()
+
+    print(f"{'size':>8} {'add_cloze':>12} {'reference':>12} {'speedup':>8}")
+    for size in (1_000, 4_000, 16_000, 64_000):
+        text = card_body(size)
+        assert add_cloze(text) == add_cloze_chars(text)
+
+        number = max(1, 200_000 // size)
+        fast = min(timeit.repeat(lambda: add_cloze(text), number=number, repeat=args.repeat))
+        slow = min(timeit.repeat(lambda: add_cloze_chars(text), number=number, repeat=args.repeat))
+
+        print(f"{len(text):>8} {fast / number * 1e6:>10.1f}us {slow / number * 1e6:>10.1f}us "
+              f"{slow / fast:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Micro-benchmark inline lexing over the cards of `test/data`: slicing the
+remaining text, matching in place, and matching in place with the
+plain-text fast path (skipping to the next character which could start
+markup).
+
+Usage: python3 bench/inline.py [--repeat N]
+"""
+
+import os
+import glob
+import argparse
+import timeit
+from typing import List, Tuple
+
+from ark.mistune import Markdown
+from ark.mistune.mistune import InlineGrammar, InlineLexer, Renderer
+from ark.parser import CardLexer, Token
+
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'test', 'data')
+
+
+def cards() -> List[Tuple[str, str]]:
+    """Return each card of the test data, named by its file and position."""
+    named = []
+    for org_file in sorted(glob.glob(os.path.join(DATA_DIR, '*.org'))):
+        with open(org_file) as fd:
+            bodies = [text for token, text in CardLexer(fd.read()).lex() if token == Token.CARD]
+        name = os.path.basename(org_file)
+        named.extend((f"{name}:{n}", body) for n, body in enumerate(bodies, 1))
+
+    return named
+
+
+def without_fast_path() -> Markdown:
+    """Match in place, but find the end of text with the `text` rule."""
+    grammar = InlineGrammar()
+    grammar.text_end = None
+    renderer = Renderer()
+    return Markdown(renderer=renderer, inline=InlineLexer(renderer, rules=grammar))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog='bench/inline.py')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repetitions')
+    args = parser.parse_args()
+
+    variants = (
+        ('sliced', Markdown(cursor=False)),
+        ('cursor', without_fast_path()),
+        ('fast', Markdown()),
+    )
+
+    print(f"{'card':<14} {'chars':>6} " + " ".join(f"{name:>10}" for name, _ in variants)
+          + f" {'speedup':>8}")
+    totals = [0.0] * len(variants)
+    for name, body in cards():
+        rendered = {md.render(body) for _, md in variants}
+        assert len(rendered) == 1, f"{name} renders differently"
+
+        times = []
+        for _, md in variants:
+            number = 200
+            best = min(timeit.repeat(lambda: md.render(body), number=number, repeat=args.repeat))
+            times.append(best / number)
+        totals = [total + seconds for total, seconds in zip(totals, times)]
+
+        print(f"{name:<14} {len(body):>6} " + " ".join(f"{t * 1e6:>8.1f}us" for t in times)
+              + f" {times[0] / times[-1]:>7.1f}x")
+
+    print(f"{'total':<14} {'':>6} " + " ".join(f"{t * 1e6:>8.1f}us" for t in totals)
+          + f" {totals[0] / totals[-1]:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
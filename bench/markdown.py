@@ -0,0 +1,83 @@
+"""
+Measure how rendering a card's Markdown scales with its size, lexing in
+place (`cursor=True`) against slicing each match off the remaining text;
+and the time to render typical cards with each grammar profile.
+
+    python3 bench/markdown.py --sizes 25 50 100 --cards 2000
+"""
+
+import time
+import argparse
+from typing import Callable, Dict, List
+
+from ark.mistune import Markdown
+from ark.renderer import PROFILES
+
+
+def inline(kilobytes: int) -> str:
+    """A long paragraph, dense with inline spans."""
+    words = (f"w{n} *e* `c` ~~x~~ " + ("\n" if n % 10 == 9 else "") for n in range(kilobytes * 64))
+    return "".join(words)[:kilobytes * 1000]
+
+
+def blocks(kilobytes: int) -> str:
+    """Many short paragraphs."""
+    return "".join(f"Line {n}\n\n" for n in range(kilobytes * 125))[:kilobytes * 1000]
+
+
+CARDS: Dict[str, Callable[[int], str]] = {'inline': inline, 'blocks': blocks}
+
+TYPICAL = """A *process* is an instance of a program; `fork()` returns ~~twice~~.
+
+- The parent receives the child's **pid**
+- The child receives ~~0~~
+  - The {n}th item, with `code`
+
+Some prose, with a [link](http://example.com) and $x^2$, and a
+second line of the same paragraph.
+
+```
+pid_t pid = ~~fork()~~;
+```
+"""
+
+
+def best(md: Markdown, texts: List[str], repeat: int) -> float:
+    """Return the fastest of `repeat` renders of every text, in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            md.render(text)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog='bench/markdown.py')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[25, 50, 100], help='Card sizes (KB)')
+    parser.add_argument('--cards', type=int, default=2000, help='Typical cards to render')
+    parser.add_argument('--repeat', type=int, default=3, help='Renders per measurement')
+    args = parser.parse_args()
+
+    print(f"{'card':<8} {'KB':>6} {'sliced (s)':>12} {'cursor (s)':>12} {'speedup':>8}")
+    for name, card in CARDS.items():
+        for size in args.sizes:
+            text = card(size)
+            sliced = best(Markdown(cursor=False), [text], args.repeat)
+            cursor = best(Markdown(cursor=True), [text], args.repeat)
+            print(f"{name:<8} {size:>6} {sliced:>12.4f} {cursor:>12.4f} {sliced / cursor:>7.1f}x")
+
+    cards = [TYPICAL.format(n=n) for n in range(args.cards)]
+    baseline = best(Markdown(cursor=False), cards, args.repeat)
+
+    print(f"\n{'profile':<16} {'cards':>6} {'seconds':>10} {'speedup':>8}")
+    print(f"{'full (sliced)':<16} {len(cards):>6} {baseline:>10.4f} {1:>7.1f}x")
+    for profile, (block_lexer, inline_lexer) in PROFILES.items():
+        md = Markdown(block=block_lexer, inline=inline_lexer)
+        seconds = best(md, cards, args.repeat)
+        print(f"{profile:<16} {len(cards):>6} {seconds:>10.4f} {baseline / seconds:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""
+Benchmark the parse -> construct -> insert pipeline over a synthetic vault.
+
+The vault is generated from the cards of `test/data/*.org`, so it exercises
+the same Markdown, TeX and code fences as the tests. Results are written as
+JSON, and can be compared against an earlier run:
+
+    python3 bench/pipeline.py --out before.json
+    git checkout <other>
+    python3 bench/pipeline.py --compare before.json
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import random
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+from typing import Any, Callable, Dict, List, Tuple
+
+from ark.ankidb import AnkiDB
+from ark.construct import construct_cards
+from ark.pipeline import ingest as ingest_files
+from ark.parser import CardLexer, Token
+from ark.renderer import Render
+from test import standin
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'test', 'data')
+PROSE = 'Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod.\n'
+
+
+def card_samples() -> Tuple[List[str], List[str]]:
+    """Return the cards of `test/data/*.org`, as (prose cards, code cards)."""
+    prose: List[str] = []
+    code: List[str] = []
+
+    for path in sorted(glob.glob(os.path.join(DATA_DIR, '*.org'))):
+        with open(path) as fd:
+            for token in CardLexer(fd.read()).lex():
+                if token[0] == Token.CARD:
+                    (code if '```' in token[1] else prose).append(token[1])
+
+    return prose, code
+
+
+def generate_vault(directory: str, args: argparse.Namespace) -> List[str]:
+    """Write a synthetic vault of Org files, returning their paths."""
+    rng = random.Random(args.seed)
+    prose_cards, code_cards = card_samples()
+    paths: List[str] = []
+
+    for n in range(args.files):
+        lines: List[str] = []
+        for section in range(args.sections):
+            level = section % args.depth + 1
+            lines.append(f"{'*' * level} Heading {n}.{section}\n")
+            lines.extend([PROSE] * args.prose)
+
+            cards = []
+            for _ in range(args.density):
+                samples = code_cards if rng.random() < args.code_ratio else prose_cards
+                cards.append(rng.choice(samples))
+
+            lines.append('#+begin_src anki\n')
+            lines.append('---\n'.join(cards))
+            lines.append('#+end_src\n')
+
+        path = os.path.join(directory, f'vault-{n}.org')
+        with open(path, 'w') as fd:
+            fd.writelines(lines)
+        paths.append(path)
+
+    return paths
+
+
+def best_of(repeat: int, stage: Callable[[], int]) -> Tuple[float, int]:
+    """Return the fastest wall time of `stage`, and the items it processed."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = stage()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings), items
+
+
+def run_stages(paths: List[str], args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    """Time each pipeline stage over the vault."""
+    contents = []
+    for path in paths:
+        with open(path) as fd:
+            contents.append(fd.read())
+
+    tokens = [CardLexer(text).lex() for text in contents]
+    bodies = [token[1] for stream in tokens for token in stream if token[0] == Token.CARD]
+    cards = [card for stream in tokens for card in construct_cards(stream)]
+
+    def lex() -> int:
+        return sum(len(CardLexer(text).lex()) for text in contents)
+
+    def construct() -> int:
+        return sum(len(construct_cards(stream)) for stream in tokens)
+
+    def render() -> int:
+        md = Render()
+        for body in bodies:
+            md.render(body)
+        return len(bodies)
+
+    def insert_bulk() -> int:
+        ankidb = AnkiDB(standin.module(), ':memory:')
+        ankidb.insert_cards_bulk(cards, 'Default')
+        return len(cards)
+
+    def ingest() -> int:
+        ingested = asyncio.run(ingest_files(
+            paths, 'Default', lambda: AnkiDB(standin.module(), ':memory:')
+        ))
+        return ingested.cards
+
+    def insert() -> int:
+        ankidb = AnkiDB(standin.module(), ':memory:')
+        ankidb.insert_cards(cards, 'Default')
+        return len(cards)
+
+    stages = [
+        ('CardLexer.lex', lex),
+        ('construct_cards', construct),
+        ('Render.render', render),
+        ('AnkiDB.insert_cards_bulk', insert_bulk),
+        ('pipeline.ingest', ingest),
+    ]
+    if args.legacy_insert:
+        stages.append(('AnkiDB.insert_cards', insert))
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, stage in stages:
+        seconds, items = best_of(args.repeat, stage)
+        results[name] = {
+            'seconds': seconds,
+            'items': items,
+            'per_item_us': seconds / items * 1e6 if items else None,
+        }
+
+    return results
+
+
+def git_commit() -> str:
+    """Return the checked-out commit, if any."""
+    completed = subprocess.run(
+        ['git', 'rev-parse', 'HEAD'],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    return completed.stdout.decode('utf-8').strip()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog='bench/pipeline.py')
+    parser.add_argument('--files', type=int, default=8, help='Org files in the vault')
+    parser.add_argument('--sections', type=int, default=100, help='Headings per file')
+    parser.add_argument('--depth', type=int, default=3, choices=(1, 2, 3), help='Heading depth')
+    parser.add_argument('--density', type=int, default=3, help='Cards per heading')
+    parser.add_argument('--code-ratio', type=float, default=0.2, help='Fraction of code cards')
+    parser.add_argument('--prose', type=int, default=20, help='Prose lines per heading')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions')
+    parser.add_argument('--legacy-insert', action='store_true',
+                        help='Also time AnkiDB.insert_cards (sleeps 2ms per card)')
+    parser.add_argument('--out', help='Write results to this JSON file')
+    parser.add_argument('--compare', help='Print ratios against an earlier JSON result')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = generate_vault(directory, args)
+        stages = run_stages(paths, args)
+
+    params = vars(args).copy()
+    del params['out'], params['compare']
+    results = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'params': params,
+        'stages': stages,
+    }
+
+    if args.out:
+        with open(args.out, 'w') as fd:
+            json.dump(results, fd, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.compare:
+        with open(args.compare) as fd:
+            baseline = json.load(fd)['stages']
+
+        print(f"{'stage':<26} {'before':>10} {'after':>10} {'ratio':>7}", file=sys.stderr)
+        for name, stage in stages.items():
+            if name not in baseline:
+                continue
+            before = baseline[name]['seconds']
+            print(f"{name:<26} {before:>9.4f}s {stage['seconds']:>9.4f}s "
+                  f"{stage['seconds'] / before:>6.2f}x", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark the start-up time of the `ark` and `arkp` entry points.
+
+Each entry point is imported in a fresh interpreter under `-X importtime`,
+and the best cumulative import time is checked against a budget. Modules
+which belong to the pipeline (and so should only load on first use) are
+reported if an entry point imports them eagerly:
+
+    python3 bench/startup.py --budget 40
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+from typing import Dict, List, Tuple
+
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+ENTRY_POINTS = ('ark.cli.main', 'ark.cli.pic')
+# Loaded lazily, by the pipeline rather than at start-up
+DEFERRED = (
+    'ark.mistune', 'ark.renderer', 'ark.construct', 'ark.index', 'pygments',
+    'xdg', 'concurrent.futures', 'multiprocessing', 'cProfile', 'dataclasses',
+)
+
+
+def import_times(module: str) -> Dict[str, Tuple[int, int]]:
+    """Import a module in a fresh interpreter.
+
+    :returns: Self and cumulative import time (us), keyed by module name
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        stderr=subprocess.PIPE,
+        env=env,
+        check=True,
+    )
+
+    times = {}
+    for line in completed.stderr.decode('utf-8').splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(own), int(cumulative))
+
+    return times
+
+
+def measure(module: str, repeat: int) -> Dict[str, object]:
+    """Return the best of `repeat` imports, with the slowest modules."""
+    runs = [import_times(module) for _ in range(repeat)]
+    best = min(runs, key=lambda times: times[module][1])
+    slowest = sorted(best.items(), key=lambda item: -item[1][0])[:10]
+
+    return {
+        'milliseconds': best[module][1] / 1000,
+        'deferred_loaded': sorted(
+            name for name in best
+            if any(name == other or name.startswith(f'{other}.') for other in DEFERRED)
+        ),
+        'slowest': {name: own / 1000 for name, (own, _) in slowest},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog='bench/startup.py')
+    parser.add_argument('--budget', type=float, default=40.0,
+                        help='Cumulative import time allowed per entry point (ms)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repetitions')
+    args = parser.parse_args()
+
+    results = {module: measure(module, args.repeat) for module in ENTRY_POINTS}
+    print(json.dumps(results, indent=2))
+
+    failures: List[str] = []
+    for module, result in results.items():
+        if result['milliseconds'] > args.budget:
+            failures.append(f"{module}: {result['milliseconds']:.1f}ms "
+                            f"exceeds budget of {args.budget:.1f}ms")
+        if result['deferred_loaded']:
+            failures.append(f"{module}: eagerly imports {', '.join(result['deferred_loaded'])}")
+
+    for failure in failures:
+        print(failure, file=sys.stderr)
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
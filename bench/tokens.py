@@ -0,0 +1,70 @@
+"""
+Measure the memory held by a file's tokens: `CardLexer`'s list of
+`(Token, str)` tuples, against `OrgIndex`'s column-wise `SpanTable`.
+
+    python3 bench/tokens.py --headings 200000
+"""
+
+import os
+import gc
+import argparse
+import tempfile
+import tracemalloc
+from typing import Any, Callable, Tuple
+
+from ark.index import OrgIndex
+from ark.parser import CardLexer
+
+
+HEADINGS = ('Definitions', 'Examples', 'Exercises', 'Proofs', 'Notes')
+BLOCK = '#+begin_src anki\nA is ~~A~~\n#+end_src\n'
+
+
+def generate(path: str, headings: int, density: int) -> None:
+    """Write an Org file with `headings` headings, and a block every `density`."""
+    with open(path, 'w') as fd:
+        for n in range(headings):
+            level = n % 3 + 1
+            fd.write(f"{'*' * level} {HEADINGS[n % len(HEADINGS)]}\n")
+            if n % density == 0:
+                fd.write(BLOCK)
+
+
+def allocated(build: Callable[[], Any]) -> Tuple[int, Any]:
+    """Return the bytes still allocated by `build`, and its result."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog='bench/tokens.py')
+    parser.add_argument('--headings', type=int, default=200000, help='Headings in the file')
+    parser.add_argument('--density', type=int, default=4, help='Headings per Anki block')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'vault.org')
+        generate(path, args.headings, args.density)
+
+        with open(path) as fd:
+            text = fd.read()
+        tuples, tokens = allocated(lambda: CardLexer(text).lex())
+
+        with OrgIndex(path) as index:
+            table, spans = allocated(lambda: OrgIndex(path, index.buffer).spans)
+
+        print(f"{'representation':<24} {'tokens':>8} {'bytes':>12} {'per token':>10}")
+        for name, size, count in (
+            ('CardLexer tuples', tuples, len(tokens)),
+            ('OrgIndex SpanTable', table, len(spans)),
+        ):
+            print(f"{name:<24} {count:>8} {size:>12} {size / count:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -19,7 +19,10 @@ setup(
         'dev': [
             'pytest',
             'pytest-cov',
-        ]
+        ],
+        'watch': [
+            'inotify_simple', # Otherwise `ark-watch` polls
+        ],
     },
     install_package_data=True,
     author="First Name",
@@ -29,6 +32,8 @@ setup(
     entry_points={
         'console_scripts': [
             'ark=ark.cli.main:main',
+            'ark-serve=ark.cli.main:serve_main',
+            'ark-watch=ark.cli.main:watch_main',
             'arkp=ark.cli.pic:main',
         ],
     },
@@ -0,0 +1,125 @@
+"""
+Local stand-in for the parts of the `anki` package used by `AnkiDB`.
+
+Notes are kept in an SQLite `notes` table shaped like Anki's, so that the
+tests exercise (and the benchmarks time) `AnkiDB` itself, and real SQL,
+without the Anki source tree. Duplicate detection mirrors `findDupes` on the
+first field.
+"""
+
+import re
+import sqlite3
+import types
+from typing import Any, Dict, List, Optional, Tuple
+
+
+_html_pattern = re.compile(r'<[^>]*>')
+
+
+def splitFields(fields: str) -> List[str]:
+    return fields.split('\x1f')
+
+
+def stripHTMLMedia(text: str) -> str:
+    return _html_pattern.sub('', text).strip()
+
+
+class DB:
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "create table notes (id integer primary key, guid text, mid integer, flds text)"
+        )
+
+    def execute(self, sql: str, *args: Any) -> sqlite3.Cursor:
+        return self.connection.execute(sql, args)
+
+    def scalar(self, sql: str, *args: Any) -> Any:
+        row = self.execute(sql, *args).fetchone()
+        return None if row is None else row[0]
+
+    def list(self, sql: str, *args: Any) -> List[Any]:
+        return [row[0] for row in self.execute(sql, *args)]
+
+    def all(self, sql: str, *args: Any) -> List[Tuple]:
+        return self.execute(sql, *args).fetchall()
+
+
+class Note:
+    _next_id = 1
+
+    def __init__(self, collection: 'Collection', model: Dict[str, Any]):
+        self.collection = collection
+        self._model = model
+        self.id = Note._next_id
+        Note._next_id += 1
+        self.guid = f'standin{self.id}'
+        self.fields = [''] * len(model['flds'])
+
+    def model(self) -> Dict[str, Any]:
+        return self._model
+
+    def flush(self, mod: Optional[int] = None) -> None:
+        self.collection.db.execute(
+            "insert or replace into notes values (?, ?, ?, ?)",
+            self.id, self.guid, self._model['id'], '\x1f'.join(self.fields),
+        )
+
+
+class Decks:
+    def __init__(self):
+        self.decks = {'Default': {'id': 1, 'name': 'Default'}}
+
+    def byName(self, name: str) -> Any:
+        return self.decks.get(name)
+
+
+class Models:
+    def __init__(self):
+        self.models = {'Cloze': {'id': 1, 'name': 'Cloze', 'did': 1, 'flds': [{}, {}]}}
+
+    def byName(self, name: str) -> Any:
+        return self.models.get(name)
+
+
+class Collection:
+    def __init__(self, path: str, log: bool = False):
+        self.db = DB(path)
+        self.decks = Decks()
+        self.models = Models()
+
+    def addNote(self, note: Note) -> None:
+        note.flush()
+
+    def getNote(self, nid: int) -> Note:
+        nid, guid, mid, fields = self.db.all("select * from notes where id = ?", nid)[0]
+        note = Note(self, self.models.byName('Cloze'))
+        note.id, note.guid, note.fields = nid, guid, splitFields(fields)
+        return note
+
+    def findDupes(self, field_name: str) -> List[Tuple[str, List[int]]]:
+        values: Dict[str, List[int]] = {}
+        for nid, fields in self.db.all("select id, flds from notes"):
+            value = stripHTMLMedia(splitFields(fields)[0])
+            if value:
+                values.setdefault(value, []).append(nid)
+        return [(value, nids) for value, nids in values.items() if len(nids) > 1]
+
+    def remNotes(self, nids: List[int]) -> None:
+        for nid in nids:
+            self.db.execute("delete from notes where id = ?", nid)
+
+    def save(self) -> None:
+        self.db.connection.commit()
+
+    def rollback(self) -> None:
+        self.db.connection.rollback()
+
+
+def module() -> types.SimpleNamespace:
+    """Return a namespace standing in for the `anki` module."""
+    return types.SimpleNamespace(
+        Collection=Collection,
+        notes=types.SimpleNamespace(Note=Note),
+        utils=types.SimpleNamespace(splitFields=splitFields, stripHTMLMedia=stripHTMLMedia),
+    )
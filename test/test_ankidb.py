@@ -2,5 +2,187 @@
 # Instantiate an empty Anki SQLite database, insert using `ankidb`.
 # Query and test.
 
+import time
+
+import pytest
+
+from ark.ankidb import AnkiDB
+from test import standin
+
+
+@pytest.fixture
+def ankidb():
+    return AnkiDB(standin.module(), ':memory:')
+
+
+def notes(ankidb):
+    """Return the first field of every note, in order of ID."""
+    return [
+        fields.split('\x1f')[0]
+        for fields in ankidb.collection.db.list("select flds from notes order by id")
+    ]
+
+
 def test_noop():
     assert 1 == 1
+
+
+def test_insert_cards_bulk(ankidb):
+    start = int(time.time() * 1000)
+
+    assert ankidb.insert_cards_bulk(['A', 'B', 'C'], 'Default') == 3
+    assert notes(ankidb) == ['A', 'B', 'C']
+
+    # IDs follow one another, and the current time
+    ids = ankidb.collection.db.list("select id from notes order by id")
+    assert ids == list(range(ids[0], ids[0] + 3))
+    assert ids[0] >= start
+
+    with pytest.raises(ValueError):
+        ankidb.insert_cards_bulk(['D'], 'Missing')
+
+
+def test_next_id(ankidb):
+    # Later batches follow existing notes, even those dated in the future
+    future = int(time.time() * 1000) + 10 ** 6
+    ankidb.collection.db.execute(
+        "insert into notes values (?, ?, ?, ?)", future, 'future', 1, 'Future\x1f'
+    )
+    assert ankidb._next_id('notes') == future + 1
+
+    ankidb.insert_cards_bulk(['A', 'B'], 'Default')
+    assert ankidb.collection.db.list("select id from notes order by id") == [
+        future, future + 1, future + 2
+    ]
+    assert notes(ankidb) == ['Future', 'A', 'B']
+
+
+def test_insert_cards_bulk_commit(ankidb):
+    ankidb.insert_cards_bulk(['A'], 'Default', commit=False)
+    ankidb.insert_cards_bulk(['B'], 'Default', commit=False)
+    assert ankidb.collection.db.connection.in_transaction
+
+    ankidb.commit()
+    assert not ankidb.collection.db.connection.in_transaction
+    assert notes(ankidb) == ['A', 'B']
+
+
+def test_duplicates(ankidb):
+    # Against notes already in the collection, compared without HTML
+    ankidb.collection.db.execute(
+        "insert into notes values (?, ?, ?, ?)", 1, 'legacy', 1, '<b>A</b>\x1f'
+    )
+    assert ankidb.insert_cards_bulk(['A', 'B', '<i>B</i>', 'C'], 'Default') == 2
+    assert notes(ankidb) == ['<b>A</b>', 'B', 'C']
+
+    # Against earlier batches of the session
+    assert ankidb.insert_cards_bulk(['C', 'D'], 'Default') == 1
+    assert notes(ankidb) == ['<b>A</b>', 'B', 'C', 'D']
+
+    # Empty fields are never duplicates
+    assert ankidb.insert_cards_bulk(['', '<br>'], 'Default') == 2
+
+
+def test_duplicate_index(ankidb):
+    ankidb.insert_cards_bulk(['A', 'B'], 'Default')
+
+    # Built from the collection once, then maintained by insertion
+    index = ankidb._duplicate_index(ankidb._get_card_model('Cloze'))
+    assert index is ankidb._duplicate_index(ankidb._get_card_model('Cloze'))
+    assert ankidb._field_hash('<b>A</b>') in index
+    assert ankidb._field_hash('C') not in index
+    assert ankidb._field_hash('') is None
+
+
+def guids(ankidb):
+    """Return the first field of every note, by GUID."""
+    return {
+        guid: fields.split('\x1f')[0]
+        for guid, fields in ankidb.collection.db.all("select guid, flds from notes")
+    }
+
+
+def test_sync_cards(ankidb):
+    assert ankidb.sync_cards({'ark:a:1': 'A', 'ark:a:2': 'B'}, 'Default', 'ark:a:') == (2, 0, 0)
+    nid = ankidb.collection.db.scalar("select id from notes where guid = 'ark:a:1'")
+
+    # Updated in place, inserted, deleted; other scopes are left alone
+    ankidb.sync_cards({'ark:b:1': 'X'}, 'Default', 'ark:b:')
+    assert ankidb.sync_cards({'ark:a:1': 'A2', 'ark:a:3': 'C'}, 'Default', 'ark:a:') == (1, 1, 1)
+    assert guids(ankidb) == {'ark:a:1': 'A2', 'ark:a:3': 'C', 'ark:b:1': 'X'}
+    assert ankidb.collection.db.scalar("select id from notes where guid = 'ark:a:1'") == nid
+
+    assert ankidb.sync_cards({'ark:a:1': 'A2', 'ark:a:3': 'C'}, 'Default', 'ark:a:') == (0, 0, 0)
+
+    # Duplicates of another identity's note aren't inserted
+    assert ankidb.sync_cards({'ark:c:1': '<b>X</b>', 'ark:c:2': 'C'}, 'Default', 'ark:c:') == (
+        0, 0, 0
+    )
+    assert len(guids(ankidb)) == 3
+
+
+def test_sync_cards_readded(ankidb):
+    # Text deleted from one identity may be inserted under another
+    ankidb.sync_cards({'ark:a:1': 'A', 'ark:a:2': 'B'}, 'Default', 'ark:a:')
+    ankidb.sync_cards({'ark:a:1': 'A'}, 'Default', 'ark:a:')
+    assert ankidb.sync_cards({'ark:a:1': 'A', 'ark:a:3': 'B'}, 'Default', 'ark:a:') == (1, 0, 0)
+    assert guids(ankidb) == {'ark:a:1': 'A', 'ark:a:3': 'B'}
+
+    # Deleted before insertion within one sync
+    assert ankidb.sync_cards({'ark:a:1': 'A', 'ark:a:4': 'B'}, 'Default', 'ark:a:') == (1, 0, 1)
+    assert guids(ankidb) == {'ark:a:1': 'A', 'ark:a:4': 'B'}
+
+    # As is changed text
+    ankidb.sync_cards({'ark:a:1': 'A2', 'ark:a:4': 'B'}, 'Default', 'ark:a:')
+    assert ankidb.sync_cards({'ark:a:4': 'B', 'ark:a:5': 'A'}, 'Default', 'ark:a:') == (1, 0, 1)
+
+
+def test_sync_cards_moved(ankidb):
+    ankidb.sync_cards({'ark:a:1': 'A', 'ark:a:2': 'B'}, 'Default', 'ark:a:')
+    ankidb.sync_cards({'ark:b:1': 'C'}, 'Default', 'ark:b:')
+    nid = ankidb.collection.db.scalar("select id from notes where guid = 'ark:b:1'")
+
+    # From a file synced before the one it moved to
+    ankidb.sync_cards({'ark:a:1': 'A'}, 'Default', 'ark:a:')
+    assert ankidb.sync_cards({'ark:b:1': 'C', 'ark:b:2': 'B'}, 'Default', 'ark:b:') == (1, 0, 0)
+
+    # From a file synced after the one it moved to, keeping its note
+    assert ankidb.sync_cards({'ark:a:1': 'A', 'ark:a:3': 'C'}, 'Default', 'ark:a:') == (0, 0, 0)
+    assert ankidb.sync_cards({'ark:b:2': 'B'}, 'Default', 'ark:b:') == (0, 1, 0)
+    assert guids(ankidb) == {'ark:a:1': 'A', 'ark:a:3': 'C', 'ark:b:2': 'B'}
+    assert ankidb.collection.db.scalar("select id from notes where guid = 'ark:a:3'") == nid
+
+
+def test_sync_cards_legacy(ankidb):
+    # Notes inserted before syncing are adopted, rather than duplicated
+    ankidb.insert_cards_bulk(['A', 'B'], 'Default')
+    nids = ankidb.collection.db.list("select id from notes order by id")
+
+    assert ankidb.sync_cards({'ark:a:1': 'A', 'ark:a:2': '<b>B</b>'}, 'Default', 'ark:a:') == (
+        0, 2, 0
+    )
+    assert guids(ankidb) == {'ark:a:1': 'A', 'ark:a:2': '<b>B</b>'}
+    assert ankidb.collection.db.list("select id from notes order by id") == nids
+
+    assert ankidb.sync_cards({'ark:a:1': 'A2', 'ark:a:2': 'B'}, 'Default', 'ark:a:') == (
+        0, 2, 0
+    )
+    assert guids(ankidb) == {'ark:a:1': 'A2', 'ark:a:2': 'B'}
+
+
+def test_sync_cards_legacy_collection(ankidb):
+    legacy = [(1, 'legacy1', 'A'), (2, 'legacy2', 'A'), (3, 'legacy3', 'B')]
+    for nid, guid, text in legacy:
+        ankidb.collection.db.execute(
+            "insert into notes values (?, ?, ?, ?)", nid, guid, 1, f'{text}\x1f'
+        )
+
+    # The oldest of duplicate legacy notes is adopted; the others are left
+    assert ankidb.sync_cards({'ark:a:1': 'A', 'ark:a:2': 'C'}, 'Default', 'ark:a:') == (1, 1, 0)
+    assert ankidb.collection.db.scalar("select guid from notes where id = 1") == 'ark:a:1'
+    assert ankidb.collection.db.scalar("select guid from notes where id = 2") == 'legacy2'
+
+    # Deleting the adopted note keeps the text a duplicate of the other
+    assert ankidb.sync_cards({'ark:a:2': 'C'}, 'Default', 'ark:a:') == (0, 0, 1)
+    assert ankidb.sync_cards({'ark:a:2': 'C', 'ark:a:3': 'A'}, 'Default', 'ark:a:') == (0, 1, 0)
+    assert ankidb.collection.db.scalar("select guid from notes where id = 2") == 'ark:a:3'
@@ -0,0 +1,132 @@
+import os
+
+from ark.cache import CardCache
+from ark.construct import construct_blocks, construct_cards
+from ark.index import OrgIndex
+from ark.parser import CardLexer
+
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+
+def test_construct_blocks():
+    for name in ('basic.org', 'test.org', 'other.org'):
+        path = os.path.join(DATA_DIR, name)
+        with open(path) as fd:
+            expected = construct_cards(CardLexer(fd.read()).lex())
+
+        entries = {}
+        with OrgIndex(path) as index:
+            cards = list(construct_blocks(index, {}, entries))
+
+        assert cards == expected
+        assert sum(len(block) for block in entries.values()) == len(expected)
+
+
+def test_construct_blocks_cached(tmp_path):
+    org_file = tmp_path / 'cached.org'
+    org_file.write_text(
+        "* Foo\n"
+        "#+begin_src anki\n"
+        "A is ~~A~~\n"
+        "#+end_src\n"
+        "#+begin_src anki\n"
+        "B is ~~B~~\n"
+        "#+end_src\n"
+    )
+
+    entries = {}
+    with OrgIndex(str(org_file)) as index:
+        lazy = construct_blocks(index, {}, entries)
+        cards = [next(lazy)]
+        # Blocks are constructed as their cards are needed
+        assert len(entries) == 1
+        cards.extend(lazy)
+    first, second = entries
+
+    # Cached blocks are reused verbatim, unknown blocks are rendered
+    with OrgIndex(str(org_file)) as index:
+        cached = list(construct_blocks(index, {first: ['cached']}, {}))
+    assert cached == ['cached', cards[1]]
+
+    # The heading context is part of the key
+    org_file.write_text(org_file.read_text().replace('Foo', 'Bar'))
+    with OrgIndex(str(org_file)) as index:
+        renamed = {}
+        list(construct_blocks(index, entries, renamed))
+    assert set(renamed).isdisjoint(entries)
+
+
+def test_card_cache(tmp_path, monkeypatch):
+    path = str(tmp_path / 'cards.json')
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'a.org').write_text('')
+
+    cache = CardCache(path)
+    assert cache.entries('a.org') == {}
+
+    cache.update('a.org', {'key': ['card']})
+    cache.save()
+
+    cache = CardCache(path)
+    assert cache.entries('a.org') == {'key': ['card']}
+    assert cache.entries(os.path.abspath('a.org')) == {'key': ['card']}
+
+    # Cards rendered with another profile are discarded
+    assert CardCache(path, 'card').files == {}
+
+    with open(path, 'w') as fd:
+        fd.write('{')
+    assert CardCache(path).files == {}
+
+
+def test_card_cache_eviction(tmp_path):
+    path = str(tmp_path / 'cards.json')
+    names = ('kept.org', 'deleted.org', 'evicted.org')
+    kept, deleted, evicted = (str(tmp_path / name) for name in names)
+    for org_file in (kept, deleted, evicted):
+        with open(org_file, 'w'):
+            pass
+
+    cache = CardCache(path)
+    for org_file in (kept, deleted, evicted):
+        cache.update(org_file, {'key': ['card']})
+
+    # Files are evicted when found missing, and dropped on saving once deleted
+    cache.evict(evicted)
+    assert cache.entries(evicted) == {}
+    os.unlink(deleted)
+    cache.save()
+
+    assert list(CardCache(path).files) == [kept]
+
+
+def test_construct_keyed(tmp_path):
+    from ark.construct import construct_keyed, file_scope
+
+    org_file = tmp_path / 'keyed.org'
+    source = (
+        "* Foo\n"
+        "#+begin_src anki\n"
+        "A is ~~A~~\n"
+        "---\n"
+        "B is ~~B~~\n"
+        "#+end_src\n"
+        "* Bar\n"
+        "#+begin_src anki\n"
+        "A is ~~A~~\n"
+        "#+end_src\n"
+    )
+    org_file.write_text(source)
+
+    with OrgIndex(str(org_file)) as index:
+        cards, _ = construct_keyed(str(org_file), index, {})
+    assert len(cards) == 3
+    assert all(key.startswith(file_scope(str(org_file))) for key in cards)
+
+    # Editing a card's text keeps its identity
+    org_file.write_text(source.replace('B is', 'C is'))
+    with OrgIndex(str(org_file)) as index:
+        edited, _ = construct_keyed(str(org_file), index, {})
+    assert list(edited) == list(cards)
+    assert list(edited.values())[1] != list(cards.values())[1]
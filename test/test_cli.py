@@ -3,3 +3,76 @@ from ark.cli import main
 
 def test_cli():
     assert 1 == 1
+
+
+def test_parallel_cards():
+    import os
+
+    data_dir = os.path.join(os.path.dirname(__file__), 'data')
+    files = [os.path.join(data_dir, name) for name in ('test.org', 'basic.org', 'other.org')]
+
+    serial = [list(main.read_cards(org_file, False, None)) for org_file in files]
+    assert list(main.parallel_cards(files, 2, False, None)) == serial
+
+
+def test_lazy_imports():
+    import sys
+    import subprocess
+
+    # The entry point must not load the rendering pipeline before it is used
+    completed = subprocess.run(
+        [sys.executable, '-c', 'import sys, ark.cli.main; print(" ".join(sys.modules))'],
+        stdout=subprocess.PIPE,
+        check=True,
+    )
+    modules = completed.stdout.decode('utf-8').split()
+    for module in ('ark.mistune', 'ark.renderer', 'xdg', 'concurrent.futures'):
+        assert module not in modules
+
+
+def test_parallel_keyed_cards():
+    import os
+
+    data_dir = os.path.join(os.path.dirname(__file__), 'data')
+    files = [os.path.join(data_dir, name) for name in ('test.org', 'basic.org', 'other.org')]
+
+    serial = [main.read_keyed_cards(org_file, None) for org_file in files]
+    assert list(main.parallel_cards(files, 2, False, None, keyed=True)) == serial
+
+
+def test_deck_named_as_command(monkeypatch):
+    import sys
+    import pytest
+
+    # `ark-serve` and `ark-watch` are entry points of their own; `ark` takes any deck
+    parsed = []
+    monkeypatch.setattr(main, 'run', lambda args: parsed.append(args) or main.EXIT_SUCCESS)
+    monkeypatch.setattr(sys, 'argv', ['ark', 'watch', 'notes.org'])
+    with pytest.raises(SystemExit):
+        main.main()
+
+    assert (parsed[0].deck, parsed[0].file) == ('watch', ['notes.org'])
+
+
+def test_daemon_options(monkeypatch, capsys):
+    import io
+    import sys
+    import pytest
+
+    monkeypatch.setattr(sys, 'argv', ['ark', '--daemon', '-j', '2', '--mmap', 'Deck', 'notes.org'])
+    with pytest.raises(SystemExit) as exit_info:
+        main.main()
+    assert exit_info.value.code == 2
+    assert "--jobs, --mmap can't be used with --daemon" in capsys.readouterr().err
+
+    # Org text from stdin is sent with `sync`, which the daemon refuses
+    sent = []
+    monkeypatch.setattr('ark.daemon.request', lambda path, payload: sent.append(payload) or {
+        'ok': False, 'error': "Org text can't be synced"
+    })
+    monkeypatch.setattr(sys, 'stdin', io.StringIO('* Heading\n'))
+    monkeypatch.setattr(sys, 'argv', ['ark', '--daemon', '--sync', 'Deck', '-'])
+    with pytest.raises(SystemExit) as exit_info:
+        main.main()
+    assert exit_info.value.code == main.EXIT_FAILURE
+    assert sent[0]['sync'] and sent[0]['org'] == '* Heading\n'
@@ -199,3 +199,64 @@ r'''<div class="container"><p>Inline TeX: [latex]\scriptsize$f(x) = $[/latex] {{
         ]
 
         assert construct_cards(token_input) == text_output
+
+
+def test_iter_cards():
+    from ark.construct import iter_cards
+
+    token_input = iter([
+        (Token.HEADER_1, 'Foo'),
+        (Token.CARD, 'A is ~~A~~\n'),
+        (Token.CARD, 'B is ~~B~~\n'),
+    ])
+
+    cards = iter_cards(token_input)
+    assert next(cards) == '''<div class="container"><h1 class="subject">Foo</h1><hr><p>A is {{c1::A}}</p>
+</div>'''
+    assert list(cards) == ['''<div class="container"><h1 class="subject">Foo</h1><hr><p>B is {{c1::B}}</p>
+</div>''']
+
+
+def test_highlight_reuse():
+    from ark.renderer import Render
+
+    md = Render()
+    card = 'A program:\n\n```python\nx = ~~1~~\n```\n'
+    first = md.render(card)
+    highlight_md = md.highlight_md
+
+    # The highlighting Markdown instance is built once, and plain cards
+    # render as they would without it
+    assert md.render(card) == first
+    assert md.highlight_md is highlight_md
+    assert md.render('A is ~~A~~\n') == Render().render('A is ~~A~~\n')
+
+
+def test_render_cache(tmp_path):
+    from ark.renderer import Render
+
+    md = Render(cache_size=2)
+    assert md.render_card('A is ~~A~~\n') == '<p>A is {{c1::A}}</p>\n'
+    assert md.render_card('A is ~~A~~\n') == '<p>A is {{c1::A}}</p>\n'
+    assert (md.hits, md.misses) == (1, 1)
+
+    # Least-recently used bodies are evicted
+    md.render_card('B is ~~B~~\n')
+    md.render_card('C is ~~C~~\n')
+    assert len(md.cache) == 2
+    md.render_card('A is ~~A~~\n')
+    assert (md.hits, md.misses) == (1, 4)
+
+    path = str(tmp_path / 'renders.json')
+    md = Render(cache_path=path)
+    md.render_card('A is ~~A~~\n')
+    md.save()
+
+    md = Render(cache_path=path)
+    assert md.render_card('A is ~~A~~\n') == '<p>A is {{c1::A}}</p>\n'
+    assert (md.hits, md.misses) == (1, 0)
+
+    # A cache rendered with another profile is discarded
+    md = Render(cache_path=path, profile='card')
+    md.render_card('A is ~~A~~\n')
+    assert (md.hits, md.misses) == (0, 1)
@@ -0,0 +1,116 @@
+import os
+import json
+import socket
+import threading
+
+from ark.ankidb import AnkiDB
+from ark.cli import main
+from ark.daemon import Daemon, serve, request
+from ark.renderer import Render
+from test import standin
+
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+
+def test_handle():
+    daemon = Daemon(None, None, Render())
+    org_file = os.path.join(DATA_DIR, 'test.org')
+
+    response = daemon.handle({'deck': 'Default', 'files': [org_file], 'dry': True})
+    assert response == {'ok': True, 'cards': list(main.read_cards(org_file, False, None))}
+
+    with open(org_file) as fd:
+        response = daemon.handle({'deck': 'Default', 'org': fd.read(), 'dry': True})
+    assert response['cards'] == list(main.read_cards(org_file, False, None))
+
+    assert not daemon.handle({'deck': 'Default', 'files': [org_file]})['ok']
+    assert not daemon.handle({'deck': 'Default', 'files': ['missing.org'], 'dry': True})['ok']
+    assert not daemon.handle({'files': [org_file], 'dry': True})['ok']
+    assert not daemon.handle([])['ok']
+
+
+def test_serve(tmp_path):
+    socket_path = str(tmp_path / 'ark.sock')
+    daemon = Daemon(None, None, Render())
+    thread = threading.Thread(target=serve, args=(daemon, socket_path))
+    thread.start()
+
+    try:
+        while not os.path.exists(socket_path):
+            thread.join(0.01)
+
+        org_file = os.path.join(DATA_DIR, 'basic.org')
+        response = request(socket_path, {'deck': 'Default', 'files': [org_file], 'dry': True})
+        assert response['cards'] == list(main.read_cards(org_file, False, None))
+    finally:
+        assert request(socket_path, {'command': 'shutdown'}) == {'ok': True}
+        thread.join()
+
+    assert not os.path.exists(socket_path)
+
+
+def test_serve_idle(tmp_path):
+    socket_path = str(tmp_path / 'ark.sock')
+    daemon = Daemon(None, None, Render())
+    thread = threading.Thread(target=serve, args=(daemon, socket_path, 0.2))
+    thread.start()
+
+    try:
+        while not os.path.exists(socket_path):
+            thread.join(0.01)
+
+        # A client which never sends a request is dropped, rather than blocking others
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as idle:
+            idle.connect(socket_path)
+            assert request(socket_path, {'command': 'ping'}) == {'ok': True}
+            assert idle.recv(1) == b''
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(socket_path)
+            client.sendall(b'[]\n')
+            with client.makefile('rb') as response:
+                assert not json.loads(response.readline())['ok']
+    finally:
+        assert request(socket_path, {'command': 'shutdown'}) == {'ok': True}
+        thread.join()
+
+
+def test_push_transaction():
+    ankidb = AnkiDB(standin.module(), ':memory:')
+    daemon = Daemon(ankidb, None, Render())
+    files = [os.path.join(DATA_DIR, name) for name in ('basic.org', 'other.org')]
+
+    def count():
+        return ankidb.collection.db.scalar("select count(*) from notes")
+
+    # The files of a request are committed together
+    commit, commits = ankidb.commit, []
+    ankidb.commit = lambda: commits.append(count()) or commit()
+    response = daemon.handle({'deck': 'Default', 'files': files[:1] * 2, 'sync': True})
+    assert response['ok'] and commits == [count()]
+    notes = count()
+
+    # A request failing partway through is rolled back, with the session's index
+    add_note, added = ankidb.collection.addNote, []
+
+    def failing(note):
+        if added:
+            raise RuntimeError('disk full')
+        added.append(note)
+        add_note(note)
+
+    ankidb.collection.addNote = failing
+    response = daemon.handle({'deck': 'Default', 'files': files[1:]})
+    assert not response['ok'] and 'disk full' in response['error']
+    assert added and count() == notes
+    assert ankidb._field_index is None
+
+    # So isn't written by the next request
+    ankidb.collection.addNote = add_note
+    response = daemon.handle({'deck': 'Default', 'files': files[1:]})
+    assert response['ok']
+    assert count() == notes + response['inserted'] == notes + len(list(
+        main.read_cards(files[1], False, None)
+    ))
+    assert commits[-1] == count()
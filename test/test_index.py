@@ -0,0 +1,87 @@
+import glob
+import os
+
+from ark.index import OrgIndex, Span, SpanTable
+from ark.parser import CardLexer, Token
+
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+
+def stream_tokens(path):
+    with open(path) as fd:
+        return list(CardLexer().stream(fd))
+
+
+def index_tokens(path):
+    with OrgIndex(path) as index:
+        return list(index.tokens())
+
+
+def test_index_data():
+    for path in sorted(glob.glob(os.path.join(DATA_DIR, '*.org'))):
+        assert index_tokens(path) == stream_tokens(path)
+
+
+def test_index_edge_cases(tmp_path):
+    org_file = tmp_path / 'edge.org'
+    org_file.write_text(
+        "* Topic\n"
+        "*Not a heading\n"
+        "**** Too deep\n"
+        "#+end_src\n"
+        "  #+begin_src python\n"
+        "  #+begin_src anki  \n"
+        "** Inside ~~block~~\n"
+        "---\n"
+        "#+begin_src anki\n"
+        "  #+end_src\n"
+        "*** Sub  \n"
+        "#+begin_src anki\n"
+        "Unterminated ~~block~~"
+    )
+
+    assert index_tokens(str(org_file)) == stream_tokens(str(org_file))
+
+
+def test_index_spans(tmp_path):
+    org_file = tmp_path / 'spans.org'
+    org_file.write_bytes(
+        b"* Foo\r\n"
+        b"#+begin_src anki\r\n"
+        b"A is ~~A~~\r\n"
+        b"#+end_src\r\n"
+    )
+
+    with OrgIndex(str(org_file)) as index:
+        assert [span.token for span in index.spans] == [Token.HEADER_1, Token.CARD]
+        assert index.text(index.spans[0]) == 'Foo'
+        assert index.block_lines(index.spans[1]) == ['A is ~~A~~\n']
+
+    assert index_tokens(str(org_file)) == stream_tokens(str(org_file))
+
+
+def test_index_empty(tmp_path):
+    org_file = tmp_path / 'empty.org'
+    org_file.write_text("")
+
+    assert index_tokens(str(org_file)) == []
+
+
+def test_span_table():
+    table = SpanTable()
+    table.append(Token.HEADER_2, 2, 5)
+    table.append(Token.CARD, 6, 20)
+
+    assert len(table) == 2
+    assert table[1] == Span(Token.CARD, 6, 20)
+    assert list(table) == [Span(Token.HEADER_2, 2, 5), Span(Token.CARD, 6, 20)]
+
+
+def test_headers_interned(tmp_path):
+    org_file = tmp_path / 'headers.org'
+    org_file.write_text('* Examples\n** Examples\n')
+
+    with OrgIndex(str(org_file)) as index:
+        (_, first), (_, second) = index.tokens()
+        assert first is second
@@ -0,0 +1,141 @@
+import glob
+import os
+
+import pytest
+
+from ark.mistune import Markdown
+from ark.mistune.mistune import _strip_anchors
+from ark.parser import CardLexer, Token
+from ark.renderer import Render
+
+
+DATA = os.path.join(os.path.dirname(__file__), 'data')
+
+SAMPLES = [
+    "Some _emphasis_, *more*, __strong__ and **stronger**.",
+    "a_b_ c, snake_case_name and _b_c",
+    "Inline `code`, ``double `tick` code`` and ~~strike~~.",
+    "A [link](http://example.com \"title\"), ![image](a.png) and <http://auto.link>.",
+    "- One\n- Two\n  - Nested\n  - More\n- Three\n\n1. First\n2. Second",
+    "- Loose\n\n- Items\n\n  With paragraphs",
+    "> Quoted\n> > Nested *quote*\n\nAfter",
+    "- 1\n  - 2\n    - 3\n      - 4\n        - 5\n          - 6\n\n            Loose\n  - Back\n- Out",
+    "> > > Deep\nlazy\n> > > > Deeper\n\n> Shallow",
+    "| A | B |\n|---|:-:|\n| 1 | *2* |\n| 3 | 4 |",
+    "| A | B |\n|--:|:--|\n" + "".join(f"| {n} \\\\| x | `{n}` |\n" for n in range(50)),
+    "## Another ##\n\n***\n\nText  \nwith break, <span>html</span> &amp; &copy;",
+    "    indented code\n\n```python\ndef main():\n    pass\n```",
+    "Escaped \\*stars\\* and \\_underscores\\_, http://bare.link/path.",
+    "Plain & text, 3 < 4 > 2 &amp; \"quoted\"  \nbroken, hhttps://x.org h! a ~ b $ c",
+]
+
+# Outside the card profile
+FULL_SAMPLES = [
+    "[ref][1] and [other]\n\n[1]: http://example.com\n[other]: http://other.com 'Title'",
+    "Footnote[^note] here.\n\n[^note]: The note, with *emphasis*.",
+    "A | B\n--- | ---\n1 | 2",
+    "Heading\n=======\n\nText",
+    "<div>block html</div>\n\nAfter",
+]
+
+
+def cards():
+    for org_file in sorted(glob.glob(os.path.join(DATA, '*.org'))):
+        with open(org_file) as fd:
+            for token, text in CardLexer(fd.read()).lex():
+                if token == Token.CARD:
+                    yield text
+
+
+def corpus():
+    for org_file in sorted(glob.glob(os.path.join(DATA, '*.org'))):
+        with open(org_file) as fd:
+            yield fd.read()
+    yield from SAMPLES
+    yield from FULL_SAMPLES
+
+
+def test_strip_anchors():
+    assert _strip_anchors(r'^ *(#{1,6}) *') == r' *(#{1,6}) *'
+    assert _strip_anchors(r'^\b_a_\b|^\*a\*') == r'(?=\w)_a_\b|\*a\*'
+    assert _strip_anchors(r'^[^^\]]+|(^a)') == r'[^^\]]+|(^a)'
+    assert _strip_anchors(r'\A\Bx') == r'(?!\w)x'
+
+
+@pytest.mark.parametrize('text', list(corpus()))
+def test_cursor_matches_slicing(text):
+    # Lexing in place must render exactly as slicing the remaining text
+    assert Markdown(cursor=True)(text) == Markdown(cursor=False)(text)
+    assert Markdown(cursor=True).render(text * 20) == Markdown(cursor=False).render(text * 20)
+    assert Markdown(hard_wrap=True)(text) == Markdown(hard_wrap=True, cursor=False)(text)
+
+
+@pytest.mark.parametrize('text', list(cards()) + SAMPLES)
+def test_card_profile(text):
+    assert Render(profile='card').render(text) == Render(profile='full').render(text)
+
+
+def test_card_profile_paragraphs():
+    md = Render(profile='card')
+
+    # Blocks outside the profile are left as paragraphs
+    assert md.render('A | B\n--- | ---\n1 | 2') == '<p>A | B\n--- | ---\n1 | 2</p>\n'
+    assert md.render('Heading\n=======') == '<p>Heading\n=======</p>\n'
+    assert md.render('[ref][1]\n\n[1]: http://example.com') == (
+        '<p>[ref][1]</p>\n<p>[1]: <a href="http://example.com">http://example.com</a></p>\n'
+    )
+
+    with pytest.raises(ValueError):
+        Render(profile='none')
+
+
+def test_cloze():
+    md = Markdown()
+
+    assert md('A ~~b c-d~~ ~~*e*~~') == (
+        '<p>A {{c1::b}} {{c1::c}}-{{c1::d}} {{c1::<em>e</em>}}</p>\n'
+    )
+    assert md('~~ a~~ and ~~b ~~, ~~c~~~~d~~') == (
+        '<p>{{c1::a}} and {{c1::b}}, {{c1::c}}{{c1::d}}</p>\n'
+    )
+
+    # Raw spans are converted on their own, left as they are if unbalanced
+    assert md('`~~x~~` and `~~y`') == '<p><code>{{c1::x}}</code> and <code>~~y</code></p>\n'
+    assert md('```\n~~a~~\n```\n') == '<pre><code>{{c1::a}}\n</code></pre>\n'
+    assert md('```\n~~a~~\n~~b\n```\n') == '<pre><code>~~a~~\n~~b\n</code></pre>\n'
+    assert md('$~~x~~$ <b>~~y~~</b>') == (
+        '<p>[latex]\\scriptsize${{c1::x}}$[/latex] <b>{{c1::y}}</b></p>\n'
+    )
+    assert md('x ~~ y') == '<p>x ~~ y</p>\n'
+
+
+def test_table():
+    md = Markdown()
+
+    assert md('| L | C | R | N |\n|:--|:-:|--:|---|\n| a \\\\| b | c | d | e |\n') == (
+        '<table>\n<thead><tr>\n'
+        '<th style="text-align:left">L</th>\n<th style="text-align:center">C</th>\n'
+        '<th style="text-align:right">R</th>\n<th>N</th>\n'
+        '</tr>\n</thead>\n<tbody>\n<tr>\n'
+        '<td style="text-align:left">a | b</td>\n<td style="text-align:center">c</td>\n'
+        '<td style="text-align:right">d</td>\n<td>e</td>\n'
+        '</tr>\n</tbody>\n</table>\n'
+    )
+
+
+def test_cloze_numbering():
+    md = Markdown(sequential_cloze=True)
+
+    # Numbered in the order rendered, raw spans included; afresh for each render
+    text = 'A ~~b c~~ `~~x~~ ~~y~~` ~~*e*~~\n\n```\n~~z~~\n```\n'
+    assert md(text) == (
+        '<p>A {{c1::b}} {{c1::c}} <code>{{c2::x}} {{c3::y}}</code> {{c4::<em>e</em>}}</p>\n'
+        '<pre><code>{{c5::z}}\n</code></pre>\n'
+    )
+    assert md('~~a~~ $~~x~~$ `~~u`') == (
+        '<p>{{c1::a}} [latex]\\scriptsize${{c2::x}}$[/latex] <code>~~u</code></p>\n'
+    )
+
+    assert Markdown()('~~a~~ `~~x~~ ~~y~~`') == (
+        '<p>{{c1::a}} <code>{{c1::x}} {{c1::y}}</code></p>\n'
+    )
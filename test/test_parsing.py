@@ -201,3 +201,93 @@ def test_invalid_routine() -> None:
     ]
 
     assert tokens == token_output
+
+
+def test_lex_matches_rules_lexer() -> None:
+    import glob
+    import os
+
+    data_dir = os.path.join(os.path.dirname(__file__), 'data')
+    org_inputs = [
+        (
+            "* Topic\n"
+            "*Not a heading\n"
+            "**** Too deep\n"
+            "  * Indented star\n"
+            "#+end_src\n"
+            "  #+begin_src python\n"
+            "  #+begin_src anki  \n"
+            "** Inside ~~block~~\n"
+            "---\n"
+            "#+begin_src anki\n"
+            "  #+end_src\n"
+            "*** Sub  \n"
+            "#+begin_src anki\n"
+            "Unterminated ~~block~~\n"
+        ),
+    ]
+    for path in sorted(glob.glob(os.path.join(data_dir, '*.org'))):
+        with open(path) as fd:
+            org_inputs.append(fd.read())
+
+    for org_input in org_inputs:
+        expected = parser.CardLexer(org_input).lex_rules()
+        assert parser.CardLexer(org_input).lex() == expected
+
+
+def test_stream_file() -> None:
+    import io
+    import os
+
+    path = os.path.join(os.path.dirname(__file__), 'data', 'test.org')
+    with open(path) as fd:
+        expected = parser.CardLexer(fd.read()).lex()
+
+    with open(path) as fd:
+        stream = parser.CardLexer().stream(fd)
+        assert next(stream) == expected[0]
+        assert [expected[0]] + list(stream) == expected
+
+    lines = io.StringIO("* Topic\n#+begin_src anki\nA is ~~A~~\n#+end_src\n")
+    assert list(parser.CardLexer().stream(lines)) == [
+        (parser.Token.HEADER_1, 'Topic'),
+        (parser.Token.CARD, 'A is ~~A~~\n'),
+    ]
+
+
+def test_skipped_cards(tmp_path) -> None:
+    from ark.index import OrgIndex
+
+    org_input = (
+        "* Heading\n"
+        "#+begin_src anki\n"
+        "A is ~~A~~\n"
+        "---\n"
+        "No cloze\n"
+        "  --- Trailing text is ignored\n"
+        "Unbalanced ~~B\n"
+        "over two lines\n"
+        "---\n"
+        "\n"
+        "---\n"
+        "C is ~~C~~\n"
+        "#+end_src\n"
+    )
+    expected = [
+        parser.SkippedCard(5, "no cloze deletion ('~~')"),
+        parser.SkippedCard(7, "unbalanced cloze deletion ('~~')"),
+    ]
+
+    lexer = parser.CardLexer(org_input)
+    assert [token[1] for token in lexer.lex()] == ['Heading', 'A is ~~A~~\n', 'C is ~~C~~\n']
+    assert lexer.skipped == expected
+
+    lexer = parser.CardLexer(org_input)
+    lexer.lex_rules()
+    assert lexer.skipped == expected
+
+    org_file = tmp_path / 'skipped.org'
+    org_file.write_text("Prose\n" + org_input)
+    with OrgIndex(str(org_file)) as index:
+        list(index.tokens())
+        assert [card.line for card in index.lexer.skipped] == [6, 8]
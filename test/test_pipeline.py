@@ -0,0 +1,61 @@
+import os
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from ark.cache import CardCache
+from ark.cli import main
+from ark.pipeline import ingest
+
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+FILES = [os.path.join(DATA_DIR, name) for name in ('test.org', 'basic.org', 'other.org')]
+
+
+class RecordingDB:
+    """Records the transactions of `ingest`, and the threads which made them."""
+    def __init__(self):
+        self.pending = []
+        self.transactions = []
+        self.threads = set()
+
+    def insert_cards_bulk(self, cards, deck, commit=True):
+        self.threads.add(threading.get_ident())
+        self.pending.extend(cards)
+        return len(self.pending)
+
+    def commit(self):
+        self.threads.add(threading.get_ident())
+        self.transactions.append(self.pending)
+        self.pending = []
+
+
+def test_ingest():
+    databases = []
+
+    def open_db():
+        databases.append(RecordingDB())
+        databases[0].threads.add(threading.get_ident())
+        return databases[0]
+
+    ingested = asyncio.run(ingest(FILES * 4, 'Default', open_db, batch_size=20))
+    database, = databases
+
+    serial = [card for org_file in FILES * 4 for card in main.read_cards(org_file, False, None)]
+    written = [card for transaction in database.transactions for card in transaction]
+    assert sorted(written) == sorted(serial)
+    assert ingested.files == 12
+    assert ingested.cards == ingested.inserted == len(serial)
+    assert ingested.transactions == len(database.transactions) > 1
+    assert all(len(transaction) < 20 + 9 for transaction in database.transactions)
+    assert len(database.threads) == 1 # Opened, written and committed on one thread
+
+
+def test_ingest_cache(tmp_path):
+    cache = CardCache(str(tmp_path / 'cards.json'))
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        ingested = asyncio.run(ingest(FILES, 'Default', None, cache, sync=True, executor=executor))
+
+    assert ingested.files == 3 and ingested.transactions == 0
+    for org_file in FILES:
+        assert cache.entries(org_file)
@@ -0,0 +1,21 @@
+import pstats
+
+from ark.profiling import profile
+
+
+def busy() -> int:
+    return sum(i * i for i in range(200000))
+
+
+def test_cprofile_out(tmp_path):
+    out = tmp_path / 'run.prof'
+    assert profile(busy, 'cprofile', str(out)) == busy()
+    assert any(name == 'busy' for (_, _, name) in pstats.Stats(str(out)).stats)
+
+
+def test_sample_out(tmp_path):
+    out = tmp_path / 'run.txt'
+    assert profile(busy, 'sample', str(out)) == busy()
+    for line in out.read_text().splitlines():
+        stack, count = line.rsplit(' ', 1)
+        assert stack and int(count) > 0
@@ -0,0 +1,39 @@
+from ark.stats import Stats
+
+
+def test_disabled():
+    stats = Stats()
+    with stats.timer('stage', items=1):
+        pass
+    assert list(stats.iterate('lazy', [1, 2])) == [1, 2]
+    assert stats.stages == {}
+
+
+def test_timer_and_iterate():
+    stats = Stats()
+    stats.enabled = True
+
+    with stats.timer('stage', items=2):
+        pass
+    with stats.timer('stage', items=3):
+        pass
+    assert list(stats.iterate('lazy', 'abc')) == ['a', 'b', 'c']
+
+    assert stats.stages['stage'].calls == 2
+    assert stats.stages['stage'].items == 5
+    assert stats.stages['lazy'].calls == 1
+    assert stats.stages['lazy'].items == 3
+    assert 'stage' in stats.table()
+
+
+def test_merge():
+    stats = Stats()
+    stats.enabled = True
+    stats.add('stage', 1.0, 1, 4)
+
+    other = Stats()
+    other.enabled = True
+    other.merge(stats.as_dict())
+    other.merge(stats.as_dict())
+
+    assert other.as_dict() == {'stage': {'seconds': 2.0, 'calls': 2, 'items': 8}}
@@ -1,3 +1,5 @@
+import itertools
+
 from ark import utils
 
 
@@ -23,8 +25,29 @@ def test_segment_section():
 
     assert utils.segment_section("a, b-d") == "~~a,~~ ~~b~~-~~d~~"
     assert utils.segment_section("b-d-e") == "~~b~~-~~d~~-~~e~~"
+    assert utils.segment_section("a b-d", "{{c1::", "}}") == "{{c1::a}} {{c1::b}}-{{c1::d}}"
 
 
 def test_add_anki():
     utils.add_anki_searchpath()
     import anki
+
+
+def test_add_cloze_numbers():
+    assert utils.add_cloze("~~A~~ ~~B~~", number=2) == "{{c2::A}} {{c2::B}}"
+    assert utils.add_cloze("~~A~~ ~~B~~", sequential=True) == "{{c1::A}} {{c2::B}}"
+    assert utils.add_cloze("~~A~~ ~~B~~ ~~C", sequential=True) == "~~A~~ ~~B~~ ~~C"
+
+
+def test_add_cloze_reference():
+    samples = [
+        "", "~", "~~", "~~~", "~~~~", "~~~~~", "A~~~B~~", "~~A~~~~B~~",
+        "<p>A ~~B~~ C ~~D E~~</p>", "~~<code>x ~ y</code>~~",
+    ]
+    samples += [
+        "".join(chars)
+        for length in range(9)
+        for chars in itertools.product("~a", repeat=length)
+    ]
+    for sample in samples:
+        assert utils.add_cloze(sample) == utils.add_cloze_chars(sample)
@@ -0,0 +1,70 @@
+import os
+import shutil
+
+import pytest
+
+from ark.renderer import Render
+from ark.watch import PollingWatcher, InotifyWatcher, batches, sync_files
+
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+
+def test_polling_watcher(tmp_path):
+    watcher = PollingWatcher(str(tmp_path), interval=0.01)
+    assert watcher.wait(0.05) == set()
+
+    org_file = str(tmp_path / 'cards.org')
+    shutil.copy(os.path.join(DATA_DIR, 'test.org'), org_file)
+    (tmp_path / 'notes.txt').write_text('Not Org')
+    assert watcher.wait(0.05) == {org_file}
+
+    with open(org_file, 'a') as fd:
+        fd.write('* Heading\n')
+    assert next(batches(watcher, debounce=0.05)) == {org_file}
+
+    os.remove(org_file)
+    assert watcher.wait(0.05) == {org_file}
+
+
+def test_inotify_watcher(tmp_path):
+    pytest.importorskip('inotify_simple')
+    watcher = InotifyWatcher(str(tmp_path))
+
+    try:
+        subdirectory = tmp_path / 'sub'
+        subdirectory.mkdir()
+        assert watcher.wait(0.1) == set()
+
+        org_file = str(subdirectory / 'cards.org')
+        shutil.copy(os.path.join(DATA_DIR, 'test.org'), org_file)
+        assert watcher.wait(0.1) == {org_file}
+    finally:
+        watcher.close()
+
+
+def test_sync_files():
+    org_files = {os.path.join(DATA_DIR, name) for name in ('test.org', 'basic.org')}
+    missing = os.path.join(DATA_DIR, 'missing.org')
+
+    counts, *_ = sync_files(org_files | {missing}, 'Default', None, None, Render())
+    assert counts == {os.path.join(DATA_DIR, 'basic.org'): 1, os.path.join(DATA_DIR, 'test.org'): 9}
+
+    counts, *_ = sync_files({missing}, 'Default', None, None, Render(), sync=True)
+    assert counts == {missing: 0}
+
+
+def test_sync_files_evicts(tmp_path):
+    from ark.cache import CardCache
+
+    org_file = str(tmp_path / 'cards.org')
+    shutil.copy(os.path.join(DATA_DIR, 'basic.org'), org_file)
+    cache = CardCache(str(tmp_path / 'cards.json'))
+
+    sync_files({org_file}, 'Default', None, cache, Render())
+    assert cache.entries(org_file)
+
+    # A deleted file's blocks leave the cache
+    os.remove(org_file)
+    sync_files({org_file}, 'Default', None, cache, Render(), sync=True)
+    assert CardCache(cache.path).files == {}